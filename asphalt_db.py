@@ -10,13 +10,38 @@ Original file is located at
 # from google.colab import drive
 # drive.mount('/content/drive')
 
+import argparse
 import csv
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
 from bs4 import BeautifulSoup
+from html_index import HtmlIndex
 import re
 import datetime
+from dataclasses import dataclass
+
+# Patterns used for every file, compiled once.
+ORDINAL_SUFFIX = re.compile(r'(\d+)(st|nd|rd|th)')
+PLANT_TYPE = re.compile('(stationary|portable)')
+PCR_VERSION = re.compile(r'\d.*')
+UNSPSC = re.compile(r'UNSPSC Code.\d*')
+DIGITS = re.compile(r'\d+')
+ISO_REFERENCE = re.compile(r'ISO.\d*\:\d*')
+AFTER_COLON = re.compile(':([^;]*)')
+NUMBER = re.compile(r'\d+(?:\.\d+)?')
+MIX_CATEGORY = re.compile(r'(Hot Mix Asphalt \(HMA\))|(Warm Mix Asphalt \(WMA\))|(Cold Mix Asphalt \(WMA\))')
+TEMPERATURE_RANGE = re.compile(r'(\d+(?:\.\d+)?)\s*to\s*(\d+(?:\.\d+)?)\s*[°C]')
+PERCENT = re.compile(r'(\d+)%')
+DECLARED_UNIT = re.compile(r'(\d+ metric tonne)')
+COLLECTION_LOCATION = re.compile(r'\b(\w+)\s*[\-‑]\s*(\w+)\b')
+COLLECTION_START = re.compile(r'beginning on ([A-Z][a-z]+[.,]?\s+\d{1,2},\s+\d{4})[.]')
+MASS_BASIS = re.compile(r'(\w+)\s+(\w+)\s*\.')
+IMPACT_METHOD = re.compile(r'(\w+\s+v\d+\.\d+)')
 
 def split_address(address):
     # Split the address into individual parts
@@ -39,7 +64,7 @@ def dateConvert(date):
     date = date.replace("Sept", "Sep")
 
     # Remove ordinal suffixes like 'st', 'nd', 'rd', 'th'
-    date = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', date)
+    date = ORDINAL_SUFFIX.sub(r'\1', date)
 
     date_formats = [
         "%Y-%m-%d",       # 2023-06-06
@@ -69,27 +94,82 @@ def removeParentheses(text):
     else:
         return text
 
-def safe_find_and_clean(soup, tag_names, attrs, use_remove_paren=True):
-  elem = soup.find(tag_names, attrs)
-  if elem and elem.text:
-    text = elem.text.strip()
-    return removeParentheses(text) if use_remove_paren else text
-  else:
-    return 'NA'
-
-def process_ids(soup, prefix, items, exclude_items, use_remove_paren=True):
-  results = []
-  for item in items:
-    if item not in exclude_items:
-      id_str = f"{prefix}{item}_1"
-      results.append(safe_find_and_clean(soup, ['span'], {'id': id_str}, use_remove_paren))
-  return results
+# Field plan: tables 4-9 are read as a flat list of fields, each mapping a CSV
+# column to the element id(s) it comes from and how the text is cleaned.
+SPAN = ('span',)
+SPAN_DIV = ('span', 'div')
+
+class MissingField(AttributeError):
+  """A required element is absent from the EPD export."""
+
+  def __init__(self, column, element_id):
+    super().__init__(f"{column}: no element with id {element_id!r}")
+    self.column = column
+    self.element_id = element_id
+
+@dataclass(frozen=True)
+class Field:
+  """
+  ids: element ids whose stripped texts are joined with sep.
+  paren: cut the text at its first "(" (removeParentheses).
+  required: raise MissingField if an element is absent; otherwise a missing
+    or empty element gives 'NA'.
+  """
+  ids: tuple
+  tags: tuple = SPAN
+  paren: bool = True
+  required: bool = False
+  sep: str = ''
+
+def required(*ids, tags=SPAN_DIV, sep=''):
+  return Field(ids, tags, True, True, sep)
+
+def optional(element_id, tags=SPAN, paren=True):
+  return Field((element_id,), tags, paren, False)
+
+def compile_plan(fields, columns):
+  """
+  Turn a field spec [(column, Field or constant str), ...] into a flat list of
+  (column, constant, ids, tags, paren, required, sep) tuples, checking that it
+  covers columns in order.
+  """
+  if [column for column, _ in fields] != list(columns):
+    raise ValueError("Field spec does not match the CSV columns")
+  plan = []
+  for column, field in fields:
+    if isinstance(field, str):
+      plan.append((column, field, (), None, False, False, ''))
+    else:
+      if not field.required and len(field.ids) != 1:
+        raise ValueError(f"{column}: optional fields read a single id")
+      plan.append((column, None, field.ids, list(field.tags), field.paren, field.required, field.sep))
+  return plan
+
+def run_plan(plan, soup):
+  values = []
+  for column, constant, ids, tags, paren, is_required, sep in plan:
+    if constant is not None:
+      values.append(constant)
+      continue
+    if is_required:
+      texts = []
+      for element_id in ids:
+        elem = soup.find(tags, {'id': element_id})
+        if elem is None:
+          raise MissingField(column, element_id)
+        texts.append(elem.text.strip())
+      text = sep.join(texts)
+    else:
+      elem = soup.find(tags, {'id': ids[0]})
+      if not (elem and elem.text):
+        values.append('NA')
+        continue
+      text = elem.text.strip()
+    values.append(removeParentheses(text) if paren else text)
+  return values
 
 # Constant
 
-agg_size_mm_reported = ''
-agg_size_mm = ''
-
 # Note: The following values are same for all the EPDs at the time of publishing. Hence, they have been hardcoded for simplicity (and speed). If they change, the code will need modifications.
 pcr_review_individual = "Joep Meijer"
 pcr_review_company = "TheRightenvironment"
@@ -144,302 +224,653 @@ CSVcolumns = ["Sl No",	"Declaration owner",	"Plant name",	"Plant Type",	"Address
               *table1Cols, *gapCols, *table2Cols, "Impact assessment method", "LCIA version",*table4Cols,*table5Cols,*table6Cols,*table7Cols,*table8Cols,*table9Cols
             ]
 
+# Tables 4-9, in CSV column order. Generated from the per-table id loops the
+# script used before, so every column reads the same element as it did then.
+TABLE_FIELDS = [
+  # ------table4------
+  ('GWP-100 (unit)', required('p5_tn_1')),
+  ('GWP-100 A1', required('p5_to_1')),
+  ('GWP-100 A2', required('p5_tp_1')),
+  ('GWP-100 A3', required('p5_tq_1')),
+  ('GWP-100 A1-A3', required('p5_tr_1')),
+  ('ODP (unit)', required('p5_tw_1', 'p5_tx_1', sep=' ')),
+  ('OPD A1', required('p5_ty_1')),
+  ('OPD A2', required('p5_tz_1')),
+  ('OPD A3', required('p5_t10_1')),
+  ('OPD A1-A3', required('p5_t11_1')),
+  ('EP (unit)', required('p5_t15_1')),
+  ('EP A1', required('p5_t16_1')),
+  ('EP A2', required('p5_t17_1')),
+  ('EP A3', required('p5_t18_1')),
+  ('EP A1-A3', required('p5_t19_1')),
+  ('AP (unit)', required('p5_t1d_1')),
+  ('AP A1', required('p5_t1e_1')),
+  ('AP A2', required('p5_t1f_1')),
+  ('AP A3', required('p5_t1g_1')),
+  ('AP A1-A3', required('p5_t1h_1')),
+  ('POCP (unit)', required('p5_t1m_1')),
+  ('POCP A1', required('p5_t1n_1')),
+  ('POCP A2', required('p5_t1o_1')),
+  ('POCP A3', required('p5_t1p_1')),
+  ('POCP A1-A3', required('p5_t1q_1')),
+  # ------table5------
+  ('RPRe (unit)', optional('p6_tn_1')),
+  ('RPRe A1', optional('p6_to_1')),
+  ('RPRe A2', optional('p6_tq_1')),
+  ('RPRe A3', optional('p6_ts_1')),
+  ('RPRe A1-A3', optional('p6_tu_1')),
+  ('RPRm (unit)', optional('p6_t10_1')),
+  ('RPRm A1', optional('p6_t11_1')),
+  ('RPRm A2', optional('p6_t13_1')),
+  ('RPRm A3', optional('p6_t15_1')),
+  ('RPRm A1-A3', optional('p6_t17_1')),
+  ('NRPRe (unit)', optional('p6_t1d_1')),
+  ('NRPRe A1', optional('p6_t1e_1')),
+  ('NRPRe A2', optional('p6_t1g_1')),
+  ('NRPRe A3', optional('p6_t1i_1')),
+  ('NRPRe A1-A3', optional('p6_t1k_1')),
+  ('NRPRm (unit)', optional('p6_t1q_1')),
+  ('NRPRm A1', optional('p6_t1r_1')),
+  ('NRPRm A2', optional('p6_t1t_1')),
+  ('NRPRm A3', optional('p6_t1v_1')),
+  ('NRPRm A1-A3', optional('p6_t1x_1')),
+  ('SM (unit)', optional('p6_t21_1')),
+  ('SM A1', optional('p6_t22_1')),
+  ('SM A2', optional('p6_t24_1')),
+  ('SM A3', optional('p6_t26_1')),
+  ('SM A1-A3', optional('p6_t28_1')),
+  ('RSF (unit)', optional('p6_t2c_1', paren=False)),
+  ('RSF A1', optional('p6_t2d_1', paren=False)),
+  ('RSF A2', optional('p6_t2f_1', paren=False)),
+  ('RSF A3', optional('p6_t2h_1', paren=False)),
+  ('RSF A1-A3', optional('p6_t2j_1', paren=False)),
+  ('NRSF (unit)', optional('p6_t2n_1', paren=False)),
+  ('NRSF A1', optional('p6_t2o_1', paren=False)),
+  ('NRSF A2', optional('p6_t2q_1', paren=False)),
+  ('NRSF A3', optional('p6_t2s_1', paren=False)),
+  ('NRSF A1-A3', optional('p6_t2u_1', paren=False)),
+  ('RE (unit)', optional('p6_t2y_1', paren=False)),
+  ('RE A1', optional('p6_t2z_1', paren=False)),
+  ('RE A2', optional('p6_t31_1')),
+  ('RE A3', optional('p6_t33_1')),
+  ('RE A1-A3', optional('p6_t35_1')),
+  ('FW (unit)', 'm³'),
+  ('FW A1', optional('p6_t3b_1')),
+  ('FW A2', optional('p6_t3d_1')),
+  ('FW A3', optional('p6_t3f_1')),
+  ('FW A1-A3', optional('p6_t3h_1')),
+  ('ADP fossil (unit)', optional('p6_t3n_1')),
+  ('ADP fossil A1', optional('p6_t3o_1')),
+  ('ADP fossil A2', optional('p6_t3q_1')),
+  ('ADP fossil A3', optional('p6_t3s_1')),
+  ('ADP fossil A1-A3', optional('p6_t3u_1')),
+  # ------table6------
+  ('HWD (unit)', optional('p7_tl_1', paren=False)),
+  ('HWD A1', optional('p7_tm_1', paren=False)),
+  ('HWD A2', optional('p7_tn_1', paren=False)),
+  ('HWD A3', optional('p7_to_1', paren=False)),
+  ('HWD A1-A3', optional('p7_tq_1', paren=False)),
+  ('NHWD (unit)', optional('p7_tv_1', paren=False)),
+  ('NHWD A1', optional('p7_tw_1', paren=False)),
+  ('NHWD A2', optional('p7_tx_1', paren=False)),
+  ('NHWD A3', optional('p7_ty_1', paren=False)),
+  ('NHWD A1-A3', optional('p7_t10_1')),
+  ('RWD-HL (unit)', 'kg or m³'),
+  ('RWD-HL A1', optional('p7_t17_1')),
+  ('RWD-HL A2', optional('p7_t18_1')),
+  ('RWD-HL A3', optional('p7_t19_1')),
+  ('RWD-HL A1-A3', optional('p7_t1b_1')),
+  ('RWD-LL (unit)', 'kg or m³'),
+  ('RWD-LL A1', optional('p7_t1j_1')),
+  ('RWD-LL A2', optional('p7_t1k_1')),
+  ('RWD-LL A3', optional('p7_t1l_1')),
+  ('RWD-LL A1-A3', optional('p7_t1n_1')),
+  ('CRU (unit)', optional('p7_t1s_1')),
+  ('CRU A1', optional('p7_t1t_1')),
+  ('CRU A2', optional('p7_t1u_1')),
+  ('CRU A3', optional('p7_t1v_1')),
+  ('CRU A1-A3', optional('p7_t1x_1')),
+  ('MFR (unit)', optional('p7_t21_1')),
+  ('MFR A1', optional('p7_t22_1')),
+  ('MFR A2', optional('p7_t23_1')),
+  ('MFR A3', optional('p7_t24_1')),
+  ('MFR A1-A3', optional('p7_t26_1')),
+  ('MFER (unit)', optional('p7_t2b_1')),
+  ('MFER A1', optional('p7_t2c_1')),
+  ('MFER A2', optional('p7_t2d_1')),
+  ('MFER A3', optional('p7_t2e_1')),
+  ('MFER A1-A3', optional('p7_t2g_1')),
+  ('REE (unit)', optional('p7_t2m_1')),
+  ('REE A1', optional('p7_t2n_1')),
+  ('REE A2', optional('p7_t2o_1')),
+  ('REE A3', optional('p7_t2p_1')),
+  ('REE A1-A3', optional('p7_t2r_1')),
+  ('GHG luc (unit)', 'kg CO2 eq'),
+  # ------table7------
+  ('GHG luc A1', optional('p8_tu_1')),
+  ('GHG luc A2', optional('p8_tv_1')),
+  ('GHG luc A3', optional('p8_tw_1')),
+  ('GHG luc A1-A3', optional('p8_tx_1')),
+  ('BCPR (unit)', 'kg CO2'),
+  ('BCPR A1', optional('p8_t15_1', tags=SPAN_DIV)),
+  ('BCPR A2', optional('p8_t17_1', tags=SPAN_DIV)),
+  ('BCPR A3', optional('p8_t18_1', tags=SPAN_DIV)),
+  ('BCPR A1-A3', optional('p8_t19_1', tags=SPAN_DIV)),
+  ('BCPE (unit)', 'kg CO2'),
+  ('BCPE A1', optional('p8_t1i_1', tags=SPAN_DIV)),
+  ('BCPE A2', optional('p8_t1j_1', tags=SPAN_DIV)),
+  ('BCPE A3', optional('p8_t1k_1', tags=SPAN_DIV)),
+  ('BCPE A1-A3', optional('p8_t1l_1', tags=SPAN_DIV)),
+  ('BCWR (unit)', 'kg CO2'),
+  ('BCWR A1', optional('p8_t1t_1', tags=SPAN_DIV)),
+  ('BCWR A2', optional('p8_t1v_1', tags=SPAN_DIV)),
+  ('BCWR A3', optional('p8_t1x_1', tags=SPAN_DIV)),
+  ('BCWR A1-A3', optional('p8_t1z_1', tags=SPAN_DIV)),
+  ('BCWN (unit)', 'kg CO2'),
+  ('BCWN A1', optional('p8_t27_1')),
+  ('BCWN A2', optional('p8_t29_1')),
+  ('BCWN A3', optional('p8_t2a_1', tags=SPAN_DIV)),
+  ('BCWN A1-A3', optional('p8_t2c_1', tags=SPAN_DIV)),
+  ('CCAL (unit)', 'kg CO2'),
+  ('CCAL A1', optional('p8_t2i_1', tags=SPAN_DIV)),
+  ('CCAL A2', optional('p8_t2k_1', tags=SPAN_DIV)),
+  ('CCAL A3', optional('p8_t2l_1', tags=SPAN_DIV)),
+  ('CCAL A1-A3', optional('p8_t2m_1', tags=SPAN_DIV)),
+  ('CCAR (unit)', 'kg CO2'),
+  ('CCAR A1', optional('p8_t2s_1', tags=SPAN_DIV)),
+  ('CCAR A2', optional('p8_t2t_1', tags=SPAN_DIV)),
+  ('CCAR A3', optional('p8_t2u_1', tags=SPAN_DIV)),
+  ('CCAR A1-A3', optional('p8_t2v_1', tags=SPAN_DIV)),
+  # ------table8------
+  ('GHG re market based accounting (unit)', required('p9_t18_1', 'p9_t19_1', 'p9_t1a_1', tags=SPAN)),
+  ('GHG re market based accounting A1', required('p9_t1b_1', tags=SPAN)),
+  ('GHG re market based accounting A2', required('p9_t1c_1', tags=SPAN)),
+  ('GHG re market based accounting A3', required('p9_t1d_1', tags=SPAN)),
+  ('GHG re market based accounting A1-A3', required('p9_t1f_1', tags=SPAN)),
+  # ------table9------
+  ('BC bio (unit)', required('p9_t2b_1', 'p9_t2c_1', 'p9_t2d_1', tags=SPAN)),
+  ('BC bio A1', required('p9_t2e_1', tags=SPAN)),
+  ('BC bio A2', required('p9_t2f_1', tags=SPAN)),
+  ('BC bio A3', required('p9_t2g_1', tags=SPAN)),
+  ('BC bio A1-A3', required('p9_t2i_1', tags=SPAN)),
+]
+TABLE_PLAN = compile_plan(TABLE_FIELDS, [*table4Cols, *table5Cols, *table6Cols, *table7Cols, *table8Cols, *table9Cols])
+
 # Define the user directory input
 html_dir  = "/content/drive/MyDrive/asphalt-htmls/EPDs as of 1 14 2025/state-wise/"
-html_files = [f for f in os.listdir(html_dir) if f.endswith('.htm')]
-
-data = []
-index=0
-
-for root, dirs, files in os.walk(html_dir):
-  for file in files:
-    if file.endswith('.htm'):
-      html_file = os.path.join(root, file)
-      with open(html_file, 'r') as f:
-        html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        # Extract data based on class names
-        slNo = index+1
-        declaration_owner = soup.find('span', {'id': 't2_1'}).text.replace("is an asphalt mixture producer.", "").strip()
-        plant_name = soup.find('span', {'id': 't4_1'}).text.strip().split(',')[0].strip() or "NA"
-        plant_type = re.findall('(stationary|portable)',soup.find('span', {'id': 't4_1'}).text.strip())[0] or "NA"
-
-        address = soup.find('div', {'id': 't8_1'}).text.strip() or "NA"
-        [street,city,state,zip] = split_address(address)
-
-        operator = soup.find('span', {'id': 'p12_t1l_1'}).text.strip() or "NA"
-        tool_dev = soup.find('span', {'id': 'p12_t18_1'}).text.strip() or "NA"
-        pcr = soup.find('span', {'id': 'p12_t1k_1'}).text.split(',')[0].strip() or "NA"
-        pcr_version = re.findall('\d.*',soup.find('span', {'id': 'p12_t1k_1'}).text.strip())[0] or "NA"
-
-        epd_link = soup.find('span', {'id': 't1g_1'}).text.split('at ')[1] or "NA"
-        declaration_num = soup.find('span', {'id': 't16_1'}).text.strip() or "NA"
-
-        unspsc = re.findall('UNSPSC Code.\d*', soup.find(string=lambda text: 'UNSPSC Code' in text))[0] or "NA"
-        unspsc_code = re.findall(r'\d+', unspsc)[0]
-
-        iso1 = re.findall('ISO.\d*\:\d*', soup.find('span', {'id': 'tv_1'}).text.strip())[0] or "NA"
-        iso2 = re.findall('ISO.\d*\:\d*',soup.find('span', {'id': 'tx_1'}).text.strip())[0] or "NA"
-        declared_prod =  re.findall(':([^;]*)',soup.find('span', {'id': 'te_1'}).text.strip())[0] or "NA"
-        specification_entity =  re.findall(':([^;]*)',soup.find('span', {'id': 'tf_1'}).text.strip())[0] or "NA"
-        specification =  re.findall(':([^;]*)',soup.find('span', {'id': 'tg_1'}).text.strip())[0] or "NA"
-        gradation_type =  re.findall(':([^;]*)',soup.find('span', {'id': 'th_1'}).text.strip())[0] or "NA"
-        design_methods =  re.findall(':([^;]*)',soup.find('span', {'id': 'ti_1'}).text.strip())[0] or "NA"
-
-        agg_size_reported = re.findall(':([^;]*)',soup.find('span', {'id': 'tj_1'}).text.strip())[0]
-        if "Not Reported" in agg_size_reported:
-          continue
-        elif "inches" in agg_size_reported:
-          agg_size_inches = re.findall(r'\d+(?:\.\d+)?', agg_size_reported)[0] or "NA"
-          agg_size_mm = float(agg_size_inches) * 25.4
-        else:
-          value = re.findall(r'\d+(?:\.\d+)?', agg_size_reported)
-          agg_size_mm_reported = value[0]
-          if type(value) == list:
-            agg_size_mm = value[0] or "NA"
-
-        perf_grade =  re.findall(':([^;]*)', soup.find('span', {'id': 'tk_1'}).text.strip())[0] or "NA"
-        cust_num = re.findall(':([^;]*)',soup.find('span', {'id': 'tl_1'}).text.strip())[0] or "NA"
-
-        mix_categoryText = re.findall('(Hot Mix Asphalt \(HMA\))|(Warm Mix Asphalt \(WMA\))|(Cold Mix Asphalt \(WMA\))',soup.find('span', {'id': 'tm_1'}).text.strip())
-        mix_category = mix_categoryText[0][0] if mix_categoryText else "NA"
-        if len(mix_categoryText[0][0]) > 1:
-          mix_category = mix_categoryText[0][0] if mix_categoryText else "NA"
-        else:
-            mix_category = mix_categoryText[0][1] if mix_categoryText else "NA"
-
-        temp = re.findall(r'(\d+(?:\.\d+)?)\s*to\s*(\d+(?:\.\d+)?)\s*[°C]',soup.find('span',{'id':'tm_1'}).text.strip())[0]
-        lower_temp = temp[0]
-        higher_temp = temp[1]
-
-        data_completeness = soup.find('div',{'id':'tr_1'}) != None
-        if data_completeness == True:
-          level = re.findall('(\d+)%',soup.find('div',{'id':'tr_1'}).text.strip())
-          raw_mat_level = level[0]+"%"
-          prod_level = level[1]+"%"
-        else:
-          raw_mat_level = 'NA'
-          prod_level = 'NA'
-
-        soft_version = soup.find('span', {'id': 't18_1'}).text.strip()  or "NA"
-        date = soup.find('span', {'id': 't1a_1'}).text.strip() or "NA"
-        date_of_issue = dateConvert(date)
-        period_validity = dateConvert(soup.find('span', {'id':'t1c_1'}).text.strip()) or "NA"
-        declared_unit_full = re.findall('(\d+ metric tonne)',soup.find('span',attrs={'id':'p3_to_1'}).text.strip())[0].split()
-        declared_unit_num = declared_unit_full[0] or "NA"
-        declared_unit = " ".join(declared_unit_full[1:]) or "NA"
-        collection_loc_text = re.findall(r'\b(\w+)\s*[\-‑]\s*(\w+)\b',soup.find('span',attrs={'id':'p3_t1c_1'}).text.strip())[0]
-        collection_loc = collection_loc_text[0]+"-"+collection_loc_text[1]
-        collection_dur = soup.find('span', {'id': 't1e_1'}).text.split('from a ')[1].split(' period')[0]
-        collection_start_date = re.search(r'beginning on ([A-Z][a-z]+[.,]?\s+\d{1,2},\s+\d{4})[.]', soup.find('span', {'id': 't1e_1'}).text).group(1)
-        collection_start = dateConvert(collection_start_date)
-        mass_basisText = re.findall('(\w+)\s+(\w+)\s*\.',soup.find('span',{'id':'p3_t1l_1'}).text.strip())[0]
-        mass_basis = mass_basisText[0] + ' ' + mass_basisText[1]
-
-        impactText = re.findall('(\w+\s+v\d+\.\d+)',soup.find('span',{'id':'p4_t1b_1'}).text.strip())[0].split()
-        impact_method = impactText[0]
-        lcia_version = impactText[1]
-
-        # ------table1------
-        gap = []
-        table1 = []
-        table1Rows = 33 # 11 rows * 3 columns
-        for row in soup.find_all('tr', class_='ingredient-row'):
-          row_data = [td.text.strip() or "NA" for td in row.find_all('td')]
-          table1.extend(row_data)
-          if('*' in row_data[1]):
-            gap.append(row_data[1])
-        while len(gap) < 11:
-          gap.append("NA")
-        remainingRows = table1Rows - len(table1)
-        if remainingRows > 0:
-          table1.extend(['NA'] * remainingRows)
-        # ------table1------
-
-        # ------table2------
-        table2 = []
-        table2Rows = 30 # 10 rows * 3 columns
-        for row in soup.find_all('tr', class_='sds-row'):
-          row_data = [td.text.strip() or "NA" for td in row.find_all('td')]
-          table2.extend(row_data)
-        if len(table2) < table2Rows:
-          table2.extend(["NA"] * (table2Rows - len(table2)))
-        # ------table2------
-
-        # ------table4------
-        table4 = []
-        for i in range(ord('n'), ord('r') + 1):
-          text = soup.find(['span', 'div'], {'id': f'p5_t{chr(i)}_1'}).text.strip()
-          table4.append(removeParentheses(text))
-
-        coldn = soup.find(['span', 'div'], {'id': f'p5_tw_1'}).text.strip() + " " + soup.find(['span', 'div'], {'id': f'p5_tx_1'}).text.strip()
-        coldo = soup.find(['span', 'div'], {'id': f'p5_ty_1'}).text.strip()
-        coldp = soup.find(['span', 'div'], {'id': f'p5_tz_1'}).text.strip()
-        coldq = soup.find(['span', 'div'], {'id': f'p5_t10_1'}).text.strip()
-        coldr = soup.find(['span', 'div'], {'id': f'p5_t11_1'}).text.strip()
-
-        table4.append(removeParentheses(coldn))
-        table4.append(removeParentheses(coldo))
-        table4.append(removeParentheses(coldp))
-        table4.append(removeParentheses(coldq))
-        table4.append(removeParentheses(coldr))
-
-        for i in range(15, 19 + 1):
-          text = soup.find(['span', 'div'], {'id': f'p5_t{i}_1'}).text.strip()
-          table4.append(removeParentheses(text))
-
-        for i in range(ord('d'), ord('h') + 1):
-          text = soup.find(['span', 'div'], {'id': f'p5_t1{chr(i)}_1'}).text.strip()
-          table4.append(removeParentheses(text))
-
-        for i in range(ord('m'), ord('q') + 1):
-          text = soup.find(['span', 'div'], {'id': f'p5_t1{chr(i)}_1'}).text.strip()
-          table4.append(removeParentheses(text))
-        # ------table4------
-
-        # ------table5------
-        table5 = []
-        chars_1 = [chr(i) for i in range(ord('n'), ord('v') + 1)]
-        exclude_1 = ['p', 'r', 't', 'v']
-        table5.extend(process_ids(soup, 'p6_t', chars_1, exclude_1))
-
-        digits_1 = list(range(0, 10))
-        exclude_2 = [2, 4, 6, 8, 9]
-        table5.extend(process_ids(soup, 'p6_t1', digits_1, exclude_2))
-
-        chars_2 = [chr(i) for i in range(ord('d'), ord('z') + 1)]
-        exclude_3 = ["h", "f", "j", "l", "m", "n", "o", "p", "s", "u", "w", "y", "z"]
-        table5.extend(process_ids(soup, 'p6_t1', chars_2, exclude_3))
-
-        digits_2 = list(range(1, 10))
-        exclude_4 = [3, 5, 7, 9]
-        table5.extend(process_ids(soup, 'p6_t2', digits_2, exclude_4))
-
-        chars_3 = [chr(i) for i in range(ord('c'), ord('z') + 1)]
-        exclude_5 = ['e', 'g', 'i', 'k', 'l', "m", 'p', 'r', 't', 'v', 'w', 'x']
-        for ch in chars_3:
-          if ch not in exclude_5:
-            id_str = f'p6_t2{ch}_1'
-            elem = soup.find(['span'], {'id': id_str})
-            text = elem.text.strip() if elem and elem.text else 'NA'
-            table5.append(text)
-
-        digits_3 = list(range(1, 10))
-        exclude_6 = [2, 4, 6, 7, 8, 9]
-        table5.extend(process_ids(soup, 'p6_t3', digits_3, exclude_6))
-
-        table5.append('m\u00b3')
-
-        chars_4 = [chr(i) for i in range(ord('b'), ord('v') + 1)]
-        exclude_7 = ['c', 'e', 'g', 'i', 'j', 'k', 'l', "m", 'p', 'r', 't', 'v']
-        table5.extend(process_ids(soup, 'p6_t3', chars_4, exclude_7))
-        # ------table5------
-
-        # ------table6------
-        table6 = []
-        chars_6_1 = [chr(i) for i in range(ord('l'), ord('z') + 1)]
-        exclude_6_1 = ['p', 'r', 's', 't', 'u', 'z']
-        table6.extend(process_ids(soup, 'p7_t', chars_6_1, exclude_6_1, use_remove_paren=False))
-
-        digits_6_1 = list(range(0, 10))
-        exclude_6_2 = [1, 2, 3, 4, 6]
-        for i in digits_6_1:
-          if i not in exclude_6_2:
-            id_str = f'p7_t1{i}_1'
-            text = safe_find_and_clean(soup, ['span'], {'id': id_str}, True)
-            if i == 5:
-                table6.append('kg or m\u00b3')
-            else:
-                table6.append(text)
-
-        table6.append(safe_find_and_clean(soup, ['span'], {'id': 'p7_t1b_1'}, True))
-        table6.append('kg or m\u00b3')
-
-        chars_6_2 = [chr(i) for i in range(ord('j'), ord('z') + 1)]
-        exclude_6_3 = ["m", "o", "p", "q", "r", "w", "y", 'z']
-        table6.extend(process_ids(soup, 'p7_t1', chars_6_2, exclude_6_3))
-
-        digits_6_3 = list(range(1, 7))
-        exclude_6_4 = [5]
-        table6.extend(process_ids(soup, 'p7_t2', digits_6_3, exclude_6_4))
-
-        chars_6_3 = [chr(i) for i in range(ord('b'), ord('s') + 1)]
-        exclude_6_5 = ['f', 'h', 'i', 'j', 'k', 'l', 'q', 's']
-        table6.extend(process_ids(soup, 'p7_t2', chars_6_3, exclude_6_5))
-        # ------table6------
-
-        # ------table7------
-        table7 = ['kg CO2 eq']
-        chars_7_1 = [chr(i) for i in range(ord('u'), ord('x') + 1)]
-        table7.extend(process_ids(soup, 'p8_t', chars_7_1, [], use_remove_paren=True))
-
-        table7.append('kg CO2')
-
-        digits_7_1 = list(range(5, 10))
-        exclude_7_1 = [6]
-        for i in digits_7_1:
-          if i != 6:
-            id_str = f'p8_t1{i}_1'
-            text = safe_find_and_clean(soup, ['span','div'], {'id': id_str})
-            table7.append(text)
-
-        table7.append('kg CO2')
-
-        chars_7_2 = [chr(i) for i in range(ord('i'), ord('z') + 1)]
-        exclude_7_2 = ["m", 'n', "o", "p", "q", 's', 'u', "w", "y"]
-        for ch in chars_7_2:
-          if ch not in exclude_7_2:
-            id_str = f'p8_t1{ch}_1'
-            if ch == 'r':
-                table7.append('kg CO2')
-            else:
-                table7.append(safe_find_and_clean(soup, ['span','div'], {'id': id_str}))
-
-        table7.append('kg CO2')
-        table7.append(safe_find_and_clean(soup, ['span'], {'id': 'p8_t27_1'}))
-        table7.append(safe_find_and_clean(soup, ['span'], {'id': 'p8_t29_1'}))
-
-        chars_7_3 = [chr(i) for i in range(ord('a'), ord('v') + 1)]
-        exclude_7_3 = ['b', 'd', 'e', 'f', 'h', 'j', 'n', 'o', 'p', 'r']
-        for ch in chars_7_3:
-          if ch not in exclude_7_3:
-            id_str = f'p8_t2{ch}_1'
-            if ch == 'g' or ch == 'q':
-              table7.append('kg CO2')
-            else:
-              table7.append(safe_find_and_clean(soup, ['span','div'], {'id': id_str}))
-        # ------table7------
-
-        # ------table8------
-        coljc = soup.find(['span'], {'id': f'p9_t18_1'}).text.strip() + soup.find(['span'], {'id': f'p9_t19_1'}).text.strip() + soup.find(['span'], {'id': f'p9_t1a_1'}).text.strip()
-        coljd=soup.find(['span'], {'id': f'p9_t1b_1'}).text.strip()
-        colje=soup.find(['span'], {'id': f'p9_t1c_1'}).text.strip()
-        coljf=soup.find(['span'], {'id': f'p9_t1d_1'}).text.strip()
-        coljg=soup.find(['span'], {'id': f'p9_t1f_1'}).text.strip()
-
-        table8 = [removeParentheses(coljc),removeParentheses(coljd),removeParentheses(colje),removeParentheses(coljf),removeParentheses(coljg)]
-        # ------table8------
-
-        # ------table9------
-        coljh = soup.find(['span'], {'id': f'p9_t2b_1'}).text.strip() + soup.find(['span'], {'id': f'p9_t2c_1'}).text.strip() + soup.find(['span'], {'id': f'p9_t2d_1'}).text.strip()
-        colji=soup.find(['span'], {'id': f'p9_t2e_1'}).text.strip()
-        coljj=soup.find(['span'], {'id': f'p9_t2f_1'}).text.strip()
-        coljk=soup.find(['span'], {'id': f'p9_t2g_1'}).text.strip()
-        coljl=soup.find(['span'], {'id': f'p9_t2i_1'}).text.strip()
-
-        table9 = [removeParentheses(coljh),removeParentheses(colji),removeParentheses(coljj),removeParentheses(coljk),removeParentheses(coljl)]
-        # ------table9------
-
-        index+=1
-        data.append([slNo, declaration_owner, plant_name, plant_type, address, street, city, state, zip, operator, tool_dev, pcr, pcr_version, pcr_review_individual,pcr_review_company,
-                    lca_3pv_individual,lca_3pv_company,epd_3pv_individual,epd_3pv_company,epd_link, declaration_num, unspsc_code, iso1, iso2, declared_prod, specification_entity, specification,
-                    gradation_type, design_methods, agg_size_reported,  agg_size_mm, perf_grade, cust_num, mix_category, lower_temp, higher_temp, data_completeness, raw_mat_level, prod_level,
-                    soft_version, date_of_issue, period_validity, declared_unit_num, declared_unit, collection_loc, collection_dur,collection_start, mass_basis, *table1, *gap, *table2,
-                    impact_method, lcia_version, *table4, *table5, *table6, *table7, *table8, *table9])
-
-# Create a DataFrame from the extracted data
-df = pd.DataFrame(data,columns=CSVcolumns)
-
-# Save the DataFrame as a CSV file
-df.to_csv('asphaltDB.csv', index=False)
\ No newline at end of file
+
+def make_soup(html_content, parser="index"):
+  """
+  Parse one EPD export. "index" (the default) builds an HtmlIndex, which parses
+  with lxml once and serves every id lookup from a dict; "bs4" builds the
+  BeautifulSoup tree the script used originally. extract_row works with either.
+  """
+  if parser == "bs4":
+    return BeautifulSoup(html_content, 'html.parser')
+  return HtmlIndex(html_content)
+
+def iter_html_files(html_dir):
+  for root, dirs, files in os.walk(html_dir):
+    for file in files:
+      if file.endswith('.htm'):
+        yield os.path.join(root, file)
+
+def extract_row(soup, slNo):
+  """
+  Extract one CSV row (in CSVcolumns order) from a parsed EPD export.
+  Returns None for EPDs whose aggregate size is not reported; those are skipped.
+  """
+  # Extract data based on class names
+  declaration_owner = soup.find('span', {'id': 't2_1'}).text.replace("is an asphalt mixture producer.", "").strip()
+  plant_name = soup.find('span', {'id': 't4_1'}).text.strip().split(',')[0].strip() or "NA"
+  plant_type = PLANT_TYPE.findall(soup.find('span', {'id': 't4_1'}).text.strip())[0] or "NA"
+
+  address = soup.find('div', {'id': 't8_1'}).text.strip() or "NA"
+  [street,city,state,zip] = split_address(address)
+
+  operator = soup.find('span', {'id': 'p12_t1l_1'}).text.strip() or "NA"
+  tool_dev = soup.find('span', {'id': 'p12_t18_1'}).text.strip() or "NA"
+  pcr = soup.find('span', {'id': 'p12_t1k_1'}).text.split(',')[0].strip() or "NA"
+  pcr_version = PCR_VERSION.findall(soup.find('span', {'id': 'p12_t1k_1'}).text.strip())[0] or "NA"
+
+  epd_link = soup.find('span', {'id': 't1g_1'}).text.split('at ')[1] or "NA"
+  declaration_num = soup.find('span', {'id': 't16_1'}).text.strip() or "NA"
+
+  unspsc = UNSPSC.findall(soup.find(string=lambda text: 'UNSPSC Code' in text))[0] or "NA"
+  unspsc_code = DIGITS.findall(unspsc)[0]
+
+  iso1 = ISO_REFERENCE.findall(soup.find('span', {'id': 'tv_1'}).text.strip())[0] or "NA"
+  iso2 = ISO_REFERENCE.findall(soup.find('span', {'id': 'tx_1'}).text.strip())[0] or "NA"
+  declared_prod =  AFTER_COLON.findall(soup.find('span', {'id': 'te_1'}).text.strip())[0] or "NA"
+  specification_entity =  AFTER_COLON.findall(soup.find('span', {'id': 'tf_1'}).text.strip())[0] or "NA"
+  specification =  AFTER_COLON.findall(soup.find('span', {'id': 'tg_1'}).text.strip())[0] or "NA"
+  gradation_type =  AFTER_COLON.findall(soup.find('span', {'id': 'th_1'}).text.strip())[0] or "NA"
+  design_methods =  AFTER_COLON.findall(soup.find('span', {'id': 'ti_1'}).text.strip())[0] or "NA"
+
+  agg_size_reported = AFTER_COLON.findall(soup.find('span', {'id': 'tj_1'}).text.strip())[0]
+  if "Not Reported" in agg_size_reported:
+    return None
+  elif "inches" in agg_size_reported:
+    agg_size_inches = NUMBER.findall(agg_size_reported)[0] or "NA"
+    agg_size_mm = float(agg_size_inches) * 25.4
+  else:
+    value = NUMBER.findall(agg_size_reported)
+    if type(value) == list:
+      agg_size_mm = value[0] or "NA"
+
+  perf_grade =  AFTER_COLON.findall(soup.find('span', {'id': 'tk_1'}).text.strip())[0] or "NA"
+  cust_num = AFTER_COLON.findall(soup.find('span', {'id': 'tl_1'}).text.strip())[0] or "NA"
+
+  mix_categoryText = MIX_CATEGORY.findall(soup.find('span', {'id': 'tm_1'}).text.strip())
+  mix_category = mix_categoryText[0][0] if mix_categoryText else "NA"
+  if len(mix_categoryText[0][0]) > 1:
+    mix_category = mix_categoryText[0][0] if mix_categoryText else "NA"
+  else:
+      mix_category = mix_categoryText[0][1] if mix_categoryText else "NA"
+
+  temp = TEMPERATURE_RANGE.findall(soup.find('span',{'id':'tm_1'}).text.strip())[0]
+  lower_temp = temp[0]
+  higher_temp = temp[1]
+
+  data_completeness = soup.find('div',{'id':'tr_1'}) != None
+  if data_completeness == True:
+    level = PERCENT.findall(soup.find('div',{'id':'tr_1'}).text.strip())
+    raw_mat_level = level[0]+"%"
+    prod_level = level[1]+"%"
+  else:
+    raw_mat_level = 'NA'
+    prod_level = 'NA'
+
+  soft_version = soup.find('span', {'id': 't18_1'}).text.strip()  or "NA"
+  date = soup.find('span', {'id': 't1a_1'}).text.strip() or "NA"
+  date_of_issue = dateConvert(date)
+  period_validity = dateConvert(soup.find('span', {'id':'t1c_1'}).text.strip()) or "NA"
+  declared_unit_full = DECLARED_UNIT.findall(soup.find('span',attrs={'id':'p3_to_1'}).text.strip())[0].split()
+  declared_unit_num = declared_unit_full[0] or "NA"
+  declared_unit = " ".join(declared_unit_full[1:]) or "NA"
+  collection_loc_text = COLLECTION_LOCATION.findall(soup.find('span',attrs={'id':'p3_t1c_1'}).text.strip())[0]
+  collection_loc = collection_loc_text[0]+"-"+collection_loc_text[1]
+  collection_dur = soup.find('span', {'id': 't1e_1'}).text.split('from a ')[1].split(' period')[0]
+  collection_start_date = COLLECTION_START.search(soup.find('span', {'id': 't1e_1'}).text).group(1)
+  collection_start = dateConvert(collection_start_date)
+  mass_basisText = MASS_BASIS.findall(soup.find('span',{'id':'p3_t1l_1'}).text.strip())[0]
+  mass_basis = mass_basisText[0] + ' ' + mass_basisText[1]
+
+  impactText = IMPACT_METHOD.findall(soup.find('span',{'id':'p4_t1b_1'}).text.strip())[0].split()
+  impact_method = impactText[0]
+  lcia_version = impactText[1]
+
+  # ------table1------
+  gap = []
+  table1 = []
+  table1Rows = 33 # 11 rows * 3 columns
+  for row in soup.find_all('tr', class_='ingredient-row'):
+    row_data = [td.text.strip() or "NA" for td in row.find_all('td')]
+    table1.extend(row_data)
+    if('*' in row_data[1]):
+      gap.append(row_data[1])
+  while len(gap) < 11:
+    gap.append("NA")
+  remainingRows = table1Rows - len(table1)
+  if remainingRows > 0:
+    table1.extend(['NA'] * remainingRows)
+  # ------table1------
+
+  # ------table2------
+  table2 = []
+  table2Rows = 30 # 10 rows * 3 columns
+  for row in soup.find_all('tr', class_='sds-row'):
+    row_data = [td.text.strip() or "NA" for td in row.find_all('td')]
+    table2.extend(row_data)
+  if len(table2) < table2Rows:
+    table2.extend(["NA"] * (table2Rows - len(table2)))
+  # ------table2------
+
+  # ------tables 4-9------
+  table_values = run_plan(TABLE_PLAN, soup)
+
+  return [slNo, declaration_owner, plant_name, plant_type, address, street, city, state, zip, operator, tool_dev, pcr, pcr_version, pcr_review_individual,pcr_review_company,
+              lca_3pv_individual,lca_3pv_company,epd_3pv_individual,epd_3pv_company,epd_link, declaration_num, unspsc_code, iso1, iso2, declared_prod, specification_entity, specification,
+              gradation_type, design_methods, agg_size_reported,  agg_size_mm, perf_grade, cust_num, mix_category, lower_temp, higher_temp, data_completeness, raw_mat_level, prod_level,
+              soft_version, date_of_issue, period_validity, declared_unit_num, declared_unit, collection_loc, collection_dur,collection_start, mass_basis, *table1, *gap, *table2,
+              impact_method, lcia_version, *table_values]
+
+class LookupTracker:
+  """
+  Passes lookups through to a parsed export and remembers the last id asked
+  for, so a failure in extract_row can be reported with the field it was reading.
+  """
+
+  def __init__(self, soup):
+    self.soup = soup
+    self.last_id = None
+
+  def find(self, name=None, attrs=None, **kwargs):
+    self.last_id = (attrs or {}).get('id', kwargs.get('id', self.last_id))
+    return self.soup.find(name, attrs, **kwargs)
+
+  def find_all(self, *args, **kwargs):
+    return self.soup.find_all(*args, **kwargs)
+
+def parse_file(html_file, parser="index"):
+  """
+  Parse one export in a worker process.
+  Returns ("ok", row without its Sl No), ("skipped", None) for EPDs extract_row
+  skips, or ("error", report) with the exception and the field id being read.
+  """
+  try:
+    with open(html_file, 'r') as f:
+      html_content = f.read()
+    soup = LookupTracker(make_soup(html_content, parser))
+  except Exception as e:
+    return "error", {"file": html_file, "error": type(e).__name__, "message": str(e), "column": None, "field_id": None}
+  try:
+    row = extract_row(soup, None)
+  except Exception as e:
+    return "error", {"file": html_file, "error": type(e).__name__, "message": str(e),
+                     "column": getattr(e, 'column', None), "field_id": getattr(e, 'element_id', soup.last_id)}
+  if row is None:
+    return "skipped", None
+  return "ok", row[1:]
+
+def parse_files(paths, workers=None, parser="index"):
+  """
+  Yield parse_file's (status, result) for each path, in the order given,
+  parsing across a process pool when there is more than one worker.
+  """
+  workers = workers or os.cpu_count() or 1
+  if workers == 1 or len(paths) < 2:
+    for path in paths:
+      yield parse_file(path, parser)
+    return
+  with ProcessPoolExecutor(max_workers=workers) as pool:
+    # map() yields in input order, holding back results that finish early.
+    yield from pool.map(parse_file, paths, [parser] * len(paths), chunksize=max(1, len(paths) // (workers * 4)))
+
+def _write_errors(errors_json, counts, errors):
+  with open(errors_json, 'w', encoding='utf-8') as f:
+    json.dump({"counts": counts, "errors": errors}, f, indent=2)
+
+def run(html_dir=html_dir, output_csv='asphaltDB.csv', errors_json='asphaltDB_errors.json', workers=None, parser="index"):
+  """
+  Parse every export under html_dir across a process pool and stream the rows
+  to output_csv in file-path order, numbering them as they are written. Files
+  that fail are left out of the CSV and listed in errors_json instead.
+  Returns:
+    dict: Counts of written, skipped and failed files.
+  """
+  paths = sorted(iter_html_files(html_dir))
+  errors = []
+  counts = {"written": 0, "skipped": 0, "failed": 0}
+  with open(output_csv, 'w', newline='', encoding='utf-8') as f:
+    writer = csv.writer(f, lineterminator='\n')
+    writer.writerow(CSVcolumns)
+    for status, result in parse_files(paths, workers, parser):
+      if status == "ok":
+        counts["written"] += 1
+        writer.writerow([counts["written"], *result])
+      elif status == "skipped":
+        counts["skipped"] += 1
+      else:
+        counts["failed"] += 1
+        errors.append(result)
+  _write_errors(errors_json, counts, errors)
+  return counts
+
+# ------incremental runs------
+# Bump when extract_row's output or the manifest layout changes, so the next
+# incremental run re-parses everything.
+EXTRACTOR_VERSION = "2"
+DECLARATION_COLUMN = CSVcolumns.index("Declaration number")
+# Declaration numbers that identify nothing; rows with these are never merged.
+MISSING_DECLARATIONS = ("", "NA")
+
+def file_sha256(path):
+  digest = hashlib.sha256()
+  with open(path, 'rb') as f:
+    for block in iter(lambda: f.read(1 << 20), b''):
+      digest.update(block)
+  return digest.hexdigest()
+
+def load_manifest(manifest_json):
+  """
+  The manifest from the last incremental run, or an empty one if there is none
+  or it was written by another extractor version.
+  """
+  try:
+    with open(manifest_json, 'r', encoding='utf-8') as f:
+      manifest = json.load(f)
+  except (OSError, ValueError):
+    return {"extractor_version": EXTRACTOR_VERSION, "files": {}}
+  if manifest.get("extractor_version") != EXTRACTOR_VERSION:
+    return {"extractor_version": EXTRACTOR_VERSION, "files": {}}
+  return manifest
+
+def changed_files(paths, manifest):
+  """
+  Split paths into (changed, unchanged) against the manifest. Size and mtime
+  are compared first; only files whose stat changed are hashed, so a touched
+  but identical file is not re-parsed.
+  Returns:
+    tuple: ({path: new manifest entry without its result}, {path: manifest entry}).
+  """
+  changed, unchanged = {}, {}
+  for path in paths:
+    stat = os.stat(path)
+    entry = manifest["files"].get(path)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+      unchanged[path] = entry
+      continue
+    sha256 = file_sha256(path)
+    if entry and entry["sha256"] == sha256:
+      unchanged[path] = dict(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    else:
+      changed[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+  return changed, unchanged
+
+def declaration_key(path, row):
+  """
+  Key a row is upserted under: its Declaration number, or its file path when
+  the number is blank or 'NA'.
+  """
+  number = row[DECLARATION_COLUMN - 1].strip()
+  return path if number in MISSING_DECLARATIONS else number
+
+def upsert_rows(paths, files):
+  """
+  Merge the rows of files that share a Declaration number.
+  Returns:
+    tuple: (rows in file-path order, number of files merged into another file's row).
+    A shared row is placed at the first of its files and takes the values of the
+    most recently modified one.
+  """
+  groups = {}
+  for path in paths:
+    entry = files[path]
+    if entry["status"] == "ok":
+      groups.setdefault(declaration_key(path, entry["row"]), []).append(entry)
+  rows = [max(entries, key=lambda entry: entry["mtime_ns"])["row"] for entries in groups.values()]
+  return rows, sum(len(entries) - 1 for entries in groups.values())
+
+def run_incremental(html_dir=html_dir, output_csv='asphaltDB.csv', errors_json='asphaltDB_errors.json',
+                    manifest_json='asphaltDB_manifest.json', workers=None, parser="index"):
+  """
+  Rebuild output_csv from the manifest, parsing only exports that are new or
+  changed since it was written. Each file's row is kept in its manifest entry,
+  so rows of deleted and changed files are dropped without touching the rest.
+  Files sharing a Declaration number are upserted into one row only when the
+  CSV is written (see upsert_rows). The CSV is written in file-path order and
+  renumbered. Without a usable manifest every file counts as new.
+  Returns:
+    dict: Counts of parsed, unchanged, deleted, written, merged, skipped and failed files.
+  """
+  manifest = load_manifest(manifest_json)
+  paths = sorted(iter_html_files(html_dir))
+  changed, files = changed_files(paths, manifest)
+  deleted = [path for path in manifest["files"] if path not in files and path not in changed]
+
+  changed_paths = sorted(changed)
+  for path, (status, result) in zip(changed_paths, parse_files(changed_paths, workers, parser)):
+    entry = changed[path]
+    entry["status"] = status
+    if status == "ok":
+      entry["row"] = result
+    elif status == "error":
+      entry["error"] = result
+    files[path] = entry
+
+  rows, merged = upsert_rows(paths, files)
+  counts = {"parsed": len(changed), "unchanged": len(paths) - len(changed), "deleted": len(deleted),
+            "written": 0, "merged": merged, "skipped": 0, "failed": 0}
+  errors = []
+  for path in paths:
+    entry = files[path]
+    if entry["status"] == "skipped":
+      counts["skipped"] += 1
+    elif entry["status"] == "error":
+      counts["failed"] += 1
+      errors.append(entry["error"])
+
+  tmp_csv = output_csv + '.tmp'
+  with open(tmp_csv, 'w', newline='', encoding='utf-8') as f:
+    writer = csv.writer(f, lineterminator='\n')
+    writer.writerow(CSVcolumns)
+    for row in rows:
+      counts["written"] += 1
+      writer.writerow([counts["written"], *row])
+  os.replace(tmp_csv, output_csv)
+
+  manifest = {"extractor_version": EXTRACTOR_VERSION, "files": files}
+  with open(manifest_json + '.tmp', 'w', encoding='utf-8') as f:
+    json.dump(manifest, f)
+  os.replace(manifest_json + '.tmp', manifest_json)
+  _write_errors(errors_json, counts, errors)
+  return counts
+
+# ------typed columnar output------
+# The CSV holds every value as text. write_parquet converts it to a Parquet
+# file with the declared column types below, so consumers load typed columns
+# directly. Numbers keep their units in the "(unit)" columns; percentages are
+# stored in percentage points (5% -> 5.0) and unparseable values ('NA') as null.
+TABLE_COLUMNS = [*table4Cols, *table5Cols, *table6Cols, *table7Cols, *table8Cols, *table9Cols]
+MODULE_SUFFIXES = (" A1", " A2", " A3", " A1-A3")
+FLOAT_COLUMNS = [c for c in TABLE_COLUMNS if c.endswith(MODULE_SUFFIXES)] + [
+  "Nominal Max. Aggregate size in mm", "Asphalt production temperature range (lower)",
+  "Asphalt production temperature range (upper)", "Individual raw material level cut off %",
+  "Product level cut off %", "Declared Unit Qty"]
+DATE_COLUMNS = ["Date of Issue", "period of validity", "LCI collection Start date"]
+BOOL_COLUMNS = ["Data completeness statement  (Y/N)"]
+CATEGORY_COLUMNS = [c for c in TABLE_COLUMNS if c.endswith("(unit)")] + [
+  "Declaration owner", "Plant Type", "Address (City)", "Address(State)", "Program operator",
+  "LCA and EPD tool developer", "PCR", "PCR version", "PCR review (individual)", "PCR review (Company)",
+  "LCA 3PV (individual)", "LCA 3PV (Company)", "EPD 3PV (individual)", "EPD 3PV (Company)",
+  "Specification Entity", "Gradation Type", "Mix design methods", "Performance Grade of asphalt binder",
+  "Asphalt Mix category", "Declared Unit", "LCI collection location", "Allocation",
+  "Impact assessment method", "LCIA version"]
+NUMERIC_NOISE = re.compile(r'[,%\s]')
+
+def parquet_columns(columns):
+  """
+  Unique Parquet names for the CSV columns. The ingredient table (table1Cols)
+  and the SDS chemical table (table2Cols) both have "Weight % 1".."Weight % N"
+  columns; the ingredient weights keep their names and the SDS ones become
+  "SDS Weight % 1".."SDS Weight % N".
+  """
+  names = []
+  seen = set()
+  for name in columns:
+    names.append(f"SDS {name}" if name in seen and name.startswith("Weight % ") else name)
+    seen.add(name)
+  return names
+
+def column_kind(name):
+  """
+  Declared type of a column (by its Parquet name): "int", "float", "date",
+  "bool", "category" or "string". The ingredient and SDS weights are floats.
+  """
+  if name == "Sl No":
+    return "int"
+  if name in FLOAT_COLUMNS or name.startswith(("Weight % ", "SDS Weight % ")):
+    return "float"
+  if name in DATE_COLUMNS:
+    return "date"
+  if name in BOOL_COLUMNS:
+    return "bool"
+  if name in CATEGORY_COLUMNS:
+    return "category"
+  return "string"
+
+def typed_frame(df):
+  """
+  Apply the declared types to a frame of strings read from the CSV.
+  All float columns are coerced together in one vectorized pass.
+  """
+  kinds = {name: column_kind(name) for name in df.columns}
+  float_columns = [name for name, kind in kinds.items() if kind == "float"]
+  cells = pd.Series(df[float_columns].to_numpy().ravel())
+  numbers = pd.to_numeric(cells.str.replace(NUMERIC_NOISE, '', regex=True), errors='coerce')
+  typed = {}
+  floats = numbers.to_numpy(dtype='float64').reshape(len(df), len(float_columns))
+  for i, name in enumerate(float_columns):
+    typed[name] = floats[:, i]
+  for name, kind in kinds.items():
+    column = df[name]
+    if kind == "int":
+      typed[name] = pd.to_numeric(column, errors='coerce').astype('Int64')
+    elif kind == "date":
+      typed[name] = pd.to_datetime(column, format='%m/%d/%Y', errors='coerce')
+    elif kind == "bool":
+      typed[name] = column.map({'True': True, 'False': False}).astype('boolean')
+    elif kind == "category":
+      typed[name] = column.replace({'NA': None}).astype('category')
+    elif kind == "string":
+      typed[name] = column
+  return pd.DataFrame(typed, columns=df.columns)
+
+def parquet_schema(columns):
+  import pyarrow as pa
+  types = {"int": pa.int64(), "float": pa.float64(), "date": pa.date32(), "bool": pa.bool_(),
+           "category": pa.dictionary(pa.int32(), pa.string()), "string": pa.string()}
+  return pa.schema([pa.field(name, types[column_kind(name)]) for name in columns])
+
+def write_parquet(output_csv='asphaltDB.csv', output_parquet='asphaltDB.parquet'):
+  """
+  Convert the CSV written by run()/run_incremental() to a typed Parquet file.
+  Columns are renamed by parquet_columns, so the SDS weights are "SDS Weight % N".
+  Returns:
+    pandas.DataFrame: The typed frame that was written.
+  """
+  import pyarrow as pa
+  import pyarrow.parquet as pq
+  with open(output_csv, 'r', newline='', encoding='utf-8') as f:
+    header = next(csv.reader(f))
+  df = typed_frame(pd.read_csv(output_csv, dtype=str, keep_default_na=False, header=0, names=parquet_columns(header)))
+  table = pa.Table.from_pandas(df, schema=parquet_schema(df.columns), preserve_index=False)
+  pq.write_table(table, output_parquet, compression='zstd')
+  return df
+
+def main():
+  arg_parser = argparse.ArgumentParser(description="Extract the asphalt EPD HTML exports into a CSV.")
+  arg_parser.add_argument("html_dir", nargs="?", default=html_dir, help="Directory searched recursively for .htm exports.")
+  arg_parser.add_argument("--output", default="asphaltDB.csv", help="CSV to write.")
+  arg_parser.add_argument("--errors", default="asphaltDB_errors.json", help="Report of files that could not be parsed.")
+  arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parsing processes.")
+  arg_parser.add_argument("--parser", choices=["index", "bs4"], default="index", help="HTML parsing layer.")
+  arg_parser.add_argument("--incremental", action="store_true",
+                          help="Only parse new or changed exports and update --output in place.")
+  arg_parser.add_argument("--manifest", default="asphaltDB_manifest.json", help="Manifest used by --incremental.")
+  arg_parser.add_argument("--parquet", help="Also write a typed Parquet copy of --output to this path.")
+  args = arg_parser.parse_args()
+
+  started = time.perf_counter()
+  if args.incremental:
+    counts = run_incremental(args.html_dir, args.output, args.errors, args.manifest, args.workers, args.parser)
+  else:
+    counts = run(args.html_dir, args.output, args.errors, args.workers, args.parser)
+  print(f"{counts} in {time.perf_counter() - started:.1f}s; failures listed in {args.errors}")
+  if args.parquet:
+    write_parquet(args.output, args.parquet)
+    print(f"Typed columns written to {args.parquet}")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Benchmark asphalt_db.py's HTML parsing: BeautifulSoup vs the lxml id index.
+
+Runs extract_row over the same corpus with both parsers, checks that every
+row is identical and reports files per second for each. It also checks a small
+built-in fixture with an XML declaration and the UNSPSC code inside a comment,
+two cases where lxml and BeautifulSoup used to disagree.
+
+Usage:
+  python bench_asphalt_db.py HTML_DIR [--limit N]
+"""
+
+import argparse
+import time
+
+from asphalt_db import extract_row, iter_html_files, make_soup
+
+# Text the exports may hold in a comment instead of a text node.
+COMMENT_FIXTURE = """<?xml version="1.0" encoding="UTF-8"?>
+<html><body><div id="p1"><span id="t1_1">Asphalt Mixture</span>
+<!-- UNSPSC Code: 30111509 --></div></body></html>"""
+
+def check_fixture():
+  found = {}
+  for parser in ("bs4", "index"):
+    text = make_soup(COMMENT_FIXTURE, parser).find(string=lambda text: 'UNSPSC Code' in text)
+    found[parser] = str(text) if text is not None else None
+  return found["bs4"] == found["index"], found
+
+def run(contents, parser):
+  rows = []
+  started = time.perf_counter()
+  for html_content in contents:
+    rows.append(extract_row(make_soup(html_content, parser), len(rows) + 1))
+  return rows, time.perf_counter() - started
+
+def main():
+  arg_parser = argparse.ArgumentParser(description="Compare asphalt_db.py parsing speed with BeautifulSoup and HtmlIndex.")
+  arg_parser.add_argument("html_dir", help="Directory of asphalt EPD .htm exports.")
+  arg_parser.add_argument("--limit", type=int, default=0, help="Only use the first N files.")
+  args = arg_parser.parse_args()
+
+  paths = sorted(iter_html_files(args.html_dir))
+  if args.limit:
+    paths = paths[:args.limit]
+  # Files are read up front so only parsing and extraction are timed.
+  contents = []
+  for path in paths:
+    with open(path, 'r') as f:
+      contents.append(f.read())
+
+  results = {}
+  for parser in ("bs4", "index"):
+    rows, seconds = run(contents, parser)
+    results[parser] = rows
+    print(f"{parser:6s} {len(contents)} files in {seconds:.2f}s: {len(contents) / seconds:.1f} files/s")
+
+  differences = [path for path, a, b in zip(paths, results["bs4"], results["index"]) if a != b]
+  print(f"Rows that differ between parsers: {len(differences)}")
+  for path in differences[:10]:
+    print(f"  {path}")
+
+  same, found = check_fixture()
+  print(f"Comment fixture: {'parsers agree' if same else 'parsers differ'} {found}")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""Id-indexed HTML lookups for the asphalt EPD exports.
+
+The exports are PDF-to-HTML layouts in which every text fragment is a
+<span>/<div> with a unique id (t2_1, p5_tn_1, ...). asphalt_db.py reads a few
+hundred of them per file. With BeautifulSoup each soup.find() rescans the
+tree, so HtmlIndex parses the document once with lxml, records every id (and
+class) in a dict on the way, and answers lookups from there.
+
+HtmlIndex.find/find_all accept the BeautifulSoup call forms asphalt_db.py
+uses, and return nodes whose .text is the concatenated text of the element,
+like a Tag's .text, so the extraction code works with either object.
+"""
+
+import re
+
+import lxml.html
+from lxml import etree
+
+# lxml refuses str input that starts with an XML declaration naming an
+# encoding (XHTML-style exports), since the text is already decoded.
+XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+
+class HtmlNode:
+  """A found element; .text matches BeautifulSoup's Tag.text."""
+
+  __slots__ = ("element",)
+
+  def __init__(self, element):
+    self.element = element
+
+  @property
+  def text(self):
+    return self.element.text_content()
+
+  @property
+  def name(self):
+    return self.element.tag
+
+  def get(self, key, default=None):
+    return self.element.get(key, default)
+
+  def find_all(self, name=None, attrs=None, class_=None, **kwargs):
+    return [HtmlNode(el) for el in self.element.iterdescendants()
+            if _matches(el, name, attrs, class_, kwargs)]
+
+  def find(self, name=None, attrs=None, class_=None, **kwargs):
+    for el in self.element.iterdescendants():
+      if _matches(el, name, attrs, class_, kwargs):
+        return HtmlNode(el)
+    return None
+
+
+def _names(name):
+  if name is None:
+    return None
+  return {name} if isinstance(name, str) else set(name)
+
+
+def _matches(el, name, attrs, class_, kwargs):
+  if not isinstance(el.tag, str):
+    return False
+  names = _names(name)
+  if names is not None and el.tag not in names:
+    return False
+  wanted = dict(attrs or {}, **kwargs)
+  if class_ is not None:
+    wanted["class"] = class_
+  for key, value in wanted.items():
+    if key == "class":
+      if value not in (el.get("class") or "").split():
+        return False
+    elif el.get(key) != value:
+      return False
+  return True
+
+
+class HtmlIndex:
+  """
+  A parsed HTML document with O(1) lookups by id.
+
+  Args:
+    html (str or bytes): The document. An XML declaration at the start of a
+      str is dropped before parsing.
+  """
+
+  def __init__(self, html):
+    if isinstance(html, str):
+      html = XML_DECLARATION.sub('', html, count=1)
+    self.root = lxml.html.document_fromstring(html)
+    self.ids = {}
+    self.classes = {}
+    # One pass over the tree; elements are listed in document order, so the
+    # first match is the one soup.find() would return.
+    for el in self.root.iter():
+      if not isinstance(el.tag, str):
+        continue
+      element_id = el.get("id")
+      if element_id is not None:
+        self.ids.setdefault(element_id, []).append(el)
+      element_class = el.get("class")
+      if element_class:
+        for name in element_class.split():
+          self.classes.setdefault(name, []).append(el)
+
+  def by_id(self, element_id):
+    elements = self.ids.get(element_id)
+    return HtmlNode(elements[0]) if elements else None
+
+  def _candidates(self, wanted, class_):
+    if "id" in wanted:
+      return self.ids.get(wanted["id"], [])
+    if class_ is not None:
+      return self.classes.get(class_, [])
+    return self.root.iter()
+
+  def find(self, name=None, attrs=None, string=None, class_=None, **kwargs):
+    """
+    Same call forms as BeautifulSoup's find(): find('span', {'id': 't2_1'}),
+    find(['span', 'div'], {'id': ...}), find('tr', class_='...') and
+    find(string=predicate), which returns the first matching text string.
+    """
+    if string is not None:
+      return self.find_string(string)
+    if attrs is not None and len(attrs) == 1 and "id" in attrs and class_ is None and not kwargs:
+      # The common case, find(tag(s), {'id': ...}): only the tag is left to check.
+      names = _names(name)
+      for el in self.ids.get(attrs["id"], ()):
+        if names is None or el.tag in names:
+          return HtmlNode(el)
+      return None
+    wanted = dict(attrs or {}, **kwargs)
+    for el in self._candidates(wanted, class_):
+      if _matches(el, name, wanted, class_, {}):
+        return HtmlNode(el)
+    return None
+
+  def find_all(self, name=None, attrs=None, class_=None, **kwargs):
+    wanted = dict(attrs or {}, **kwargs)
+    return [HtmlNode(el) for el in self._candidates(wanted, class_) if _matches(el, name, wanted, class_, {})]
+
+  def find_string(self, predicate):
+    """
+    First text string in document order for which predicate(text) is true, or None.
+    Like BeautifulSoup, comment text is searched too (itertext() would skip it).
+    """
+    for text in _strings(self.root):
+      if predicate(text):
+        return text
+    return None
+
+
+def _strings(el):
+  """
+  The text strings under el in document order: element and comment text, and tails.
+  """
+  if el.text and (isinstance(el.tag, str) or el.tag is etree.Comment):
+    yield el.text
+  for child in el:
+    yield from _strings(child)
+    if child.tail:
+      yield child.tail
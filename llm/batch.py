@@ -0,0 +1,238 @@
+"""
+Headless batch conversion of EPD PDFs/HTMLs to openEPD JSON.
+
+Runs the same stages as the Streamlit app (markdown conversion, injection
+guard, EPD check, openEPD extraction, JSON cleanup and schema validation) over
+many documents. Conversion runs in a process pool and LLM calls run
+concurrently on the event loop, connected by a bounded queue, so throughput is
+limited by the LLM endpoint rather than by either stage alone.
+
+Usage:
+    python batch.py INPUT [INPUT ...] --output-dir openepd_out
+
+Each INPUT is a directory (searched recursively for .pdf/.htm/.html files), a
+single document, or a manifest file (.txt) listing one document path per line.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from prompt_injection_handling import guard_document_for_llm, StreamingGuard
+from utils import (iter_markdown_chunks, join_markdown_chunks, iter_indexed_chunks, html_to_markdown, ask_rchat_async,
+                   build_filecheck_messages, build_extraction_messages, is_valid_epd, LLM_MAX_CONCURRENCY)
+from chunked_extraction import needs_chunking, extract_openepd_chunked, filecheck_excerpt, PAGE_CHUNK_CHARS
+from sliced_extraction import extract_openepd_sliced, EXTRACTION_MODE
+from table_extraction import extract_matrices, IMPACT_TABLES
+from repair import repair_openepd_async
+
+DOCUMENT_EXTENSIONS = ('.pdf', '.htm', '.html')
+
+
+def collect_inputs(inputs: list) -> list:
+    """
+    Expand directories and manifest files into a sorted, de-duplicated list of document paths.
+    """
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(DOCUMENT_EXTENSIONS))
+        elif item.lower().endswith(DOCUMENT_EXTENSIONS):
+            paths.append(item)
+        else:
+            base = os.path.dirname(os.path.abspath(item))
+            with open(item, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        paths.append(line if os.path.isabs(line) else os.path.join(base, line))
+    return sorted(set(paths))
+
+
+def output_names(paths: list) -> dict:
+    """
+    Map each input path to a unique output file name, <stem>.openepd.json.
+    """
+    names = {}
+    used = set()
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name = f"{stem}.openepd.json"
+        n = 1
+        while name in used:
+            n += 1
+            name = f"{stem}-{n}.openepd.json"
+        used.add(name)
+        names[path] = name
+    return names
+
+
+def convert_document(path: str) -> Tuple[str, dict, Optional[list]]:
+    """
+    CPU stage: convert one document to markdown and run the injection guard.
+    Runs in a worker process.
+
+    Returns:
+        tuple: (guarded markdown, guard report, page index). The page index
+        holds (start, end, page_start, page_end) for each chunk of a PDF's
+        markdown (see join_markdown_chunks); it is None for HTML.
+    """
+    if path.lower().endswith('.pdf'):
+        # Documents are already spread across the pool, so extract pages
+        # serially, guarding each chunk of pages before it becomes markdown.
+        # Chunks are kept small so long documents can be re-split by page.
+        guard = StreamingGuard()
+        page_index = []
+        chunks = iter_markdown_chunks(path, workers=1, guard=guard, chunk_chars=PAGE_CHUNK_CHARS)
+        markdown = join_markdown_chunks(chunks, page_index)
+        return markdown, guard.report(), page_index
+    markdown, report = guard_document_for_llm(html_to_markdown(path))
+    return markdown, report, None
+
+
+def _set_stage(record: dict, stage: str, on_stage: Optional[Callable[[str], None]]):
+    record["stage"] = stage
+    if on_stage:
+        on_stage(stage)
+
+
+async def llm_stages(markdown: str, record: dict, on_stage: Optional[Callable[[str], None]] = None,
+                     page_index: Optional[list] = None) -> Optional[dict]:
+    """
+    Network stage: EPD check, openEPD extraction, cleanup, validation and repair.
+    Fills in record and returns the sanitized openEPD document, if one was produced.
+    on_stage, if given, is called with the name of each stage as it starts.
+    page_index, from convert_document, lets a long PDF be extracted in page-aligned
+    chunks; record["chunks"] then lists the pages of each one.
+    """
+    started = time.perf_counter()
+    _set_stage(record, "filecheck", on_stage)
+    check_reply = await ask_rchat_async(build_filecheck_messages(filecheck_excerpt(markdown)))
+    record["check_reply"] = check_reply
+    if not is_valid_epd(check_reply):
+        record["status"] = "not_epd"
+        return None
+
+    _set_stage(record, "extraction", on_stage)
+    # Matrices read from the document's tables are not requested from the LLM.
+    matrices = extract_matrices(markdown) if IMPACT_TABLES == "rules" else {}
+    record["table_fields"] = list(matrices)
+    if needs_chunking(markdown):
+        source_chunks = iter_indexed_chunks(markdown, page_index) if page_index else None
+        llm_openepd = await extract_openepd_chunked(markdown, source_chunks=source_chunks,
+                                                    report=record.setdefault("chunks", []))
+    elif EXTRACTION_MODE == "sliced" or matrices:
+        llm_openepd = await extract_openepd_sliced(markdown, known=matrices)
+    else:
+        llm_openepd = await ask_rchat_async(build_extraction_messages(markdown))
+    record["seconds"]["llm"] = round(time.perf_counter() - started, 3)
+
+    # Parses (fixing small syntax slips locally) and re-asks only the fields
+    # that fail the schema.
+    _set_stage(record, "validation", on_stage)
+    sanitized_openepd, errors = await repair_openepd_async(llm_openepd, markdown)
+    record["validation_errors"] = [f"{e['pointer'] or '/'}: {e['message']}" for e in errors]
+    record["status"] = "invalid" if errors else "ok"
+    _set_stage(record, "done", on_stage)
+    return sanitized_openepd
+
+
+async def run_batch(paths: list, output_dir: str, cpu_workers: int, llm_workers: int) -> list:
+    """
+    Convert every path and write one openEPD JSON per document into output_dir.
+
+    Returns:
+        list: One summary record per input, in input order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    names = output_names(paths)
+    records = {path: {"input": path, "output": None, "status": "pending", "stage": "convert",
+                      "error": None, "seconds": {}} for path in paths}
+    loop = asyncio.get_running_loop()
+    # Converted documents wait here for a free LLM worker; the bound keeps
+    # conversion from running arbitrarily far ahead of the LLM.
+    converted = asyncio.Queue(maxsize=llm_workers * 2)
+
+    with ProcessPoolExecutor(max_workers=cpu_workers) as pool:
+        cpu_slots = asyncio.Semaphore(cpu_workers)
+
+        async def convert_one(path):
+            record = records[path]
+            async with cpu_slots:
+                started = time.perf_counter()
+                try:
+                    markdown, record["guard"], page_index = await loop.run_in_executor(pool, convert_document, path)
+                except Exception as e:
+                    record["status"] = "error"
+                    record["error"] = f"{type(e).__name__}: {e}"
+                    return
+                record["seconds"]["convert"] = round(time.perf_counter() - started, 3)
+                await converted.put((path, markdown, page_index))
+
+        async def convert_stage():
+            await asyncio.gather(*(convert_one(path) for path in paths))
+            for _ in range(llm_workers):
+                await converted.put(None)
+
+        async def llm_worker():
+            while (item := await converted.get()) is not None:
+                path, markdown, page_index = item
+                record = records[path]
+                try:
+                    openepd = await llm_stages(markdown, record, page_index=page_index)
+                except Exception as e:
+                    record["status"] = "error"
+                    record["error"] = f"{type(e).__name__}: {e}"
+                    continue
+                if openepd is not None:
+                    output_path = os.path.join(output_dir, names[path])
+                    with open(output_path, "w", encoding="utf-8") as f:
+                        json.dump(openepd, f, indent=2)
+                    record["output"] = output_path
+                print(f"{record['status']:>8}  {path}")
+
+        await asyncio.gather(convert_stage(), *(llm_worker() for _ in range(llm_workers)))
+
+    return [records[path] for path in paths]
+
+
+def write_summary(records: list, output_dir: str, elapsed: float) -> dict:
+    counts = {}
+    for record in records:
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+    summary = {
+        "total": len(records),
+        "counts": counts,
+        "elapsed_seconds": round(elapsed, 3),
+        "documents": records,
+    }
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert EPD PDFs/HTMLs to openEPD JSON in bulk.")
+    parser.add_argument("inputs", nargs="+", help="Directories, documents or manifest files.")
+    parser.add_argument("--output-dir", default="openepd_out", help="Where to write the JSON files and summary.json.")
+    parser.add_argument("--cpu-workers", type=int, default=os.cpu_count() or 1, help="Processes used for markdown conversion.")
+    parser.add_argument("--llm-workers", type=int, default=LLM_MAX_CONCURRENCY, help="Documents in the LLM stages at once.")
+    args = parser.parse_args()
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    paths = collect_inputs(args.inputs)
+    print(f"Converting {len(paths)} documents...")
+    started = time.perf_counter()
+    records = asyncio.run(run_batch(paths, args.output_dir, args.cpu_workers, args.llm_workers))
+    summary = write_summary(records, args.output_dir, time.perf_counter() - started)
+    print(f"Done in {summary['elapsed_seconds']}s: {summary['counts']}")
+
+
+if __name__ == "__main__":
+    main()
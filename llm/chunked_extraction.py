@@ -0,0 +1,204 @@
+"""
+Map-reduce openEPD extraction for EPDs that do not fit in one prompt.
+
+The markdown is split into chunks of at most CHUNK_MAX_TOKENS (estimated), on
+page breaks where present, then headings, paragraphs and lines. When the PDF
+conversion's page chunks are given, consecutive pages are packed together
+instead, and each extraction chunk keeps the pages it covers. Each chunk is
+sent through the normal extraction prompt concurrently, and the partial openEPD
+objects are merged deterministically by merge_openepd().
+"""
+import asyncio
+import json
+import os
+import re
+from collections import Counter
+from typing import Iterable, List, Optional
+
+from utils import ask_rchat_async, build_extraction_messages, extract_first_json, sanitize_json, DocumentChunk
+
+# Documents estimated above CHUNK_MAX_TOKENS are extracted chunk by chunk.
+CHUNK_MAX_TOKENS = int(os.environ.get("CHUNK_MAX_TOKENS", 24000))
+# Rough characters-per-token ratio for English/numeric EPD text.
+CHARS_PER_TOKEN = 4
+# Size of the PDF page chunks kept for page provenance: small enough that
+# several of them pack into one extraction chunk.
+PAGE_CHUNK_CHARS = CHUNK_MAX_TOKENS * CHARS_PER_TOKEN // 8
+
+# Split points, coarsest first: page breaks, markdown headings, paragraphs, lines.
+_BOUNDARIES = [re.compile(r"\f"), re.compile(r"\n(?=#{1,6} )"), re.compile(r"\n\s*\n"), re.compile(r"\n")]
+
+_EMPTY_STRINGS = ("", "--")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _split(text: str, max_chars: int, level: int = 0) -> list:
+    if len(text) <= max_chars:
+        return [text]
+    if level == len(_BOUNDARIES):
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+    pieces = []
+    for piece in _BOUNDARIES[level].split(text):
+        pieces.extend(_split(piece, max_chars, level + 1) if len(piece) > max_chars else [piece])
+    return pieces
+
+
+def chunk_markdown(markdown: str, max_tokens: int = CHUNK_MAX_TOKENS) -> list:
+    """
+    Split markdown into chunks of at most max_tokens (estimated), packing
+    consecutive pieces together and breaking only on the coarsest boundary
+    that makes them fit.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current = ""
+    for piece in _split(markdown, max_chars):
+        if not piece.strip():
+            continue
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def pack_chunks(chunks: Iterable[DocumentChunk], max_tokens: int = CHUNK_MAX_TOKENS) -> List[DocumentChunk]:
+    """
+    Pack consecutive document chunks into extraction chunks of at most
+    max_tokens (estimated), keeping the page range each one covers. A chunk
+    over the budget on its own is split with chunk_markdown, and its pieces
+    keep its page range.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    packed = []
+    current = None
+    for chunk in chunks:
+        pieces = [chunk.text] if len(chunk.text) <= max_chars else chunk_markdown(chunk.text, max_tokens)
+        for text in pieces:
+            if not text.strip():
+                continue
+            if current and len(current.text) + len(text) + 2 > max_chars:
+                packed.append(current)
+                current = None
+            if current is None:
+                current = DocumentChunk(text, chunk.page_start, chunk.page_end)
+            else:
+                current.text = f"{current.text}\n\n{text}"
+                current.page_end = chunk.page_end
+    if current:
+        packed.append(current)
+    return packed
+
+
+def _pages(chunk: DocumentChunk) -> Optional[list]:
+    return [chunk.page_start, chunk.page_end] if chunk.page_start is not None else None
+
+
+def _is_empty(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip() in _EMPTY_STRINGS
+    if isinstance(value, dict):
+        return all(_is_empty(v) for v in value.values())
+    if isinstance(value, list):
+        return all(_is_empty(v) for v in value)
+    return False
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True)
+
+
+def merge_values(values: list):
+    """
+    Merge the values one field took in several partial documents.
+
+    Objects are merged key by key, lists are unioned (in order of first
+    appearance, without duplicates or empty items), and conflicting scalars are
+    resolved by majority vote with ties going to the earliest chunk. Empty
+    values ("--", "", null) only win when no chunk has anything better.
+    """
+    filled = [v for v in values if not _is_empty(v)]
+    if not filled:
+        return values[0] if values else None
+    if all(isinstance(v, dict) for v in filled):
+        keys = list(dict.fromkeys(k for v in values if isinstance(v, dict) for k in v))
+        return {k: merge_values([v[k] for v in values if isinstance(v, dict) and k in v]) for k in keys}
+    if all(isinstance(v, list) for v in filled):
+        merged = {}
+        for v in filled:
+            for item in v:
+                if not _is_empty(item):
+                    merged.setdefault(_canonical(item), item)
+        return list(merged.values())
+    votes = Counter(_canonical(v) for v in filled)
+    best = max(votes.values())
+    return next(v for v in filled if votes[_canonical(v)] == best)
+
+
+def merge_openepd(partials: list) -> dict:
+    """
+    Reconcile partial openEPD objects extracted from different chunks of one EPD.
+    impacts, resource_uses and output_flows are unioned by indicator and module.
+    """
+    return merge_values(partials) or {}
+
+
+async def _extract_chunk(chunk: DocumentChunk, index: int, total: int):
+    pages = f" (pages {chunk.page_start}-{chunk.page_end})" if chunk.page_start is not None else ""
+    note = f"\n\nThis is part {index + 1} of {total} of the document{pages}. Only extract values that appear in this part."
+    messages = build_extraction_messages(chunk.text)
+    messages[0] = {"role": "system", "content": messages[0]["content"] + note}
+    reply = await ask_rchat_async(messages)
+    try:
+        return sanitize_json(json.loads(extract_first_json(reply)))
+    except json.JSONDecodeError:
+        # One unusable chunk should not sink the whole document.
+        return None
+
+
+async def extract_openepd_chunked(markdown: str, max_tokens: int = CHUNK_MAX_TOKENS,
+                                  source_chunks: Optional[Iterable[DocumentChunk]] = None,
+                                  report: Optional[list] = None) -> dict:
+    """
+    Extract openEPD from markdown chunk by chunk, concurrently, and merge the results.
+    Args:
+        markdown (str): The document markdown.
+        max_tokens (int): Token budget of one chunk.
+        source_chunks (Iterable[DocumentChunk]): The document's page chunks, if it has pages;
+            they are packed into extraction chunks instead of splitting markdown.
+        report (list): If given, one {"part", "pages", "chars", "parsed"} entry is
+            appended per extraction chunk, so failures can be traced to pages.
+    """
+    if source_chunks is not None:
+        chunks = pack_chunks(source_chunks, max_tokens)
+    else:
+        chunks = [DocumentChunk(text, None, None) for text in chunk_markdown(markdown, max_tokens)]
+    partials = await asyncio.gather(*(_extract_chunk(c, i, len(chunks)) for i, c in enumerate(chunks)))
+    if report is not None:
+        report.extend({"part": i + 1, "pages": _pages(c), "chars": len(c.text), "parsed": isinstance(p, dict)}
+                      for i, (c, p) in enumerate(zip(chunks, partials)))
+    partials = [p for p in partials if isinstance(p, dict)]
+    if not partials:
+        raise ValueError(f"None of the {len(chunks)} chunks produced valid JSON.")
+    return merge_openepd(partials)
+
+
+def needs_chunking(markdown: str, max_tokens: int = CHUNK_MAX_TOKENS) -> bool:
+    return estimate_tokens(markdown) > max_tokens
+
+
+def filecheck_excerpt(markdown: str, max_tokens: int = CHUNK_MAX_TOKENS) -> str:
+    """
+    The part of the document sent to the EPD validity check: the whole document
+    if it fits, otherwise its first chunk, where EPD identifiers normally appear.
+    """
+    if not needs_chunking(markdown, max_tokens):
+        return markdown
+    return chunk_markdown(markdown, max_tokens)[0]
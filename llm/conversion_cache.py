@@ -0,0 +1,110 @@
+import os
+import threading
+from typing import Optional
+
+# On-disk cache of PDF/HTML -> markdown conversions. Entries are keyed by the
+# SHA-256 of the uploaded bytes and the converter version, so identical uploads
+# are only converted once. The least recently used entries are evicted once the
+# cache grows past CONVERSION_CACHE_MAX_BYTES.
+CONVERSION_CACHE_DIR = os.environ.get("CONVERSION_CACHE_DIR", "conversion_cache")
+CONVERSION_CACHE_MAX_BYTES = int(os.environ.get("CONVERSION_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+class ConversionCache:
+    """
+    Content-addressed markdown store with LRU, size-based eviction.
+
+    Each entry is one file; its mtime is bumped on every hit and serves as the
+    recency stamp for eviction.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(digest: str, kind: str, version: str) -> str:
+        """
+        Build a cache key from the SHA-256 hex digest of the file, its kind ("pdf"/"html")
+        and the converter version.
+        """
+        return f"{kind}-v{version}-{digest}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.md")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return the cached markdown for key, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                markdown_text = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return markdown_text
+
+    def put(self, key: str, markdown_text: str):
+        """
+        Store markdown under key, then evict old entries if the cache is over budget.
+        Empty markdown (a failed conversion) is not stored.
+        """
+        if not markdown_text.strip():
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(markdown_text)
+        # Atomic rename, so concurrent readers never see a half-written entry.
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _entries(self) -> list:
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".md"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+
+conversion_cache = ConversionCache(CONVERSION_CACHE_DIR, CONVERSION_CACHE_MAX_BYTES)
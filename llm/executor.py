@@ -0,0 +1,79 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Conversion executor settings. At most CONVERT_MAX_WORKERS documents are
+# converted at once and at most CONVERT_MAX_QUEUE more may wait for a slot;
+# anything beyond that is rejected instead of queued.
+CONVERT_MAX_WORKERS = int(os.environ.get("CONVERT_MAX_WORKERS", 2))
+CONVERT_MAX_QUEUE = int(os.environ.get("CONVERT_MAX_QUEUE", 8))
+CONVERT_EXECUTOR = os.environ.get("CONVERT_EXECUTOR", "thread")
+
+
+class ExecutorBusy(Exception):
+    """Raised when the executor is already holding as many tasks as it allows."""
+
+
+class BoundedExecutor:
+    """
+    Runs blocking functions off the event loop with a cap on running + waiting tasks.
+    Meant to be driven from a single event loop (the API server's).
+
+    Args:
+        max_workers (int): Number of tasks that run concurrently.
+        max_queue (int): Number of tasks allowed to wait for a free worker.
+        kind (str): "thread" or "process".
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, kind: str = "thread"):
+        if kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="convert")
+        self.capacity = max_workers + max_queue
+        self.pending = 0
+        # Created on first use, so it binds to the event loop serving requests.
+        # Callers waiting for a slot sleep on it until a task finishes.
+        self._slots = None
+
+    def _release(self):
+        self.pending -= 1
+        self._slots.release()
+
+    def _release_soon(self, loop):
+        # Done-callbacks run in the pool's thread; the slot is handed back on the loop.
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            pass  # The loop is closed, so nobody is waiting for the slot.
+
+    async def run(self, fn, *args, wait: bool = False):
+        """
+        Run fn(*args) in the pool and await its result.
+        Raises ExecutorBusy if the pool is at capacity, unless wait is True,
+        in which case it waits for a free slot instead.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.capacity)
+        # locked() is also true while others are waiting, so callers that
+        # don't wait can't jump the queue.
+        if self._slots.locked() and not wait:
+            raise ExecutorBusy(f"{self.pending} conversions already running or queued.")
+        await self._slots.acquire()
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        # Release the slot when the work itself finishes, not when the caller
+        # stops waiting, so disconnected clients can't push us past capacity.
+        future.add_done_callback(lambda _future: self._release_soon(loop))
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+convert_executor = BoundedExecutor(CONVERT_MAX_WORKERS, CONVERT_MAX_QUEUE, CONVERT_EXECUTOR)
@@ -0,0 +1,244 @@
+"""
+Lean HTML -> markdown conversion for EPD HTML exports.
+
+The exports are PDF-to-HTML layouts: thousands of absolutely positioned
+<span id="..."> elements with inline styles, one or a few words each.
+markdownify keeps every fragment and escapes its punctuation, which makes
+conversion slow and the markdown much larger than the text it holds.
+
+This converter parses incrementally with lxml and renders each element as
+soon as it closes, replacing the subtree with its rendered text, so the tree
+never holds more than the open elements. Along the way it:
+- drops script/style/head and other non-content elements,
+- merges positioned spans that share a baseline into one line,
+- renders headings, list items and line breaks,
+- rebuilds <table> rows as compact markdown tables.
+
+Run as a script to compare output size and time with markdownify:
+    python html_markdown.py FILE.htm [...]
+"""
+import argparse
+import logging
+import re
+import time
+from typing import List, Optional
+
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# Characters of decoded HTML fed to the parser at a time.
+FEED_CHARS = 1 << 20
+
+_SKIP_TAGS = {"script", "style", "head", "title", "meta", "link", "noscript", "template", "svg", "iframe",
+              "object", "img", "canvas", "map", "button", "select", "input", "textarea"}
+_BLOCK_TAGS = {"html", "body", "div", "p", "section", "article", "header", "footer", "main", "nav", "aside",
+               "blockquote", "pre", "form", "fieldset", "figure", "figcaption", "address", "center",
+               "ul", "ol", "dl", "dt", "dd", "li", "table", "h1", "h2", "h3", "h4", "h5", "h6"}
+_HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+# tr/td/th are not listed: the enclosing table renders its rows and cells.
+
+# Tag given to an element whose subtree has been replaced by its rendered markdown.
+_RENDERED = "x-md"
+
+_WHITESPACE = re.compile(r"\s+")
+_VERTICAL_POSITION = re.compile(r"(?:^|;)\s*(?:top|bottom)\s*:\s*(-?[\d.]+)")
+
+
+class _Lines:
+    """
+    Accumulates inline text into lines and lines into a markdown fragment.
+    """
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self._current: List[str] = []
+
+    def text(self, s: Optional[str]):
+        if s:
+            self._current.append(_WHITESPACE.sub(" ", s))
+
+    def space(self):
+        if self._current and not self._current[-1].endswith(" "):
+            self._current.append(" ")
+
+    def newline(self):
+        line = "".join(self._current).strip()
+        if line:
+            self.lines.append(_WHITESPACE.sub(" ", line))
+        self._current = []
+
+    def block(self, fragment: str, spaced: bool = False):
+        self.newline()
+        if spaced and self.lines and self.lines[-1]:
+            self.lines.append("")
+        self.lines.extend(fragment.split("\n"))
+        if spaced:
+            self.lines.append("")
+
+    def result(self) -> str:
+        self.newline()
+        # Collapse runs of blank lines left by spaced blocks.
+        out = []
+        for line in self.lines:
+            if line or (out and out[-1]):
+                out.append(line)
+        return "\n".join(out).strip("\n")
+
+
+def _vertical_position(el) -> Optional[str]:
+    style = el.get("style")
+    if not style:
+        return None
+    m = _VERTICAL_POSITION.search(style)
+    return m.group(1) if m else None
+
+
+def _render_children(el, lines: _Lines):
+    """
+    Render el's text and children, in document order, into lines.
+    Positioned inline children on the same baseline join one line; a new
+    baseline starts a new line.
+    """
+    lines.text(el.text)
+    baseline = None
+    for child in el:
+        tag = child.tag
+        if not isinstance(tag, str):
+            pass
+        elif tag == _RENDERED:
+            if child.text:
+                lines.block(child.text, spaced=child.get("spaced") == "1")
+            baseline = None
+        elif tag == "br":
+            lines.newline()
+            baseline = None
+        elif tag not in _SKIP_TAGS:
+            position = _vertical_position(child)
+            if position is not None:
+                if baseline is not None and position != baseline:
+                    lines.newline()
+                else:
+                    lines.space()
+                baseline = position
+            _render_children(child, lines)
+        lines.text(child.tail)
+
+
+def _cell_text(cell) -> str:
+    lines = _Lines()
+    _render_children(cell, lines)
+    return " ".join(lines.result().split("\n")).replace("|", "\\|").strip()
+
+
+def markdown_table(rows: List[List[str]]) -> str:
+    """
+    Render rows of cell text as a compact markdown table, the first row as its header.
+    Cells must already be single-line with pipes escaped; empty rows are dropped.
+    """
+    rows = [row for row in rows if any(row)]
+    if not rows:
+        return ""
+    width = max(len(r) for r in rows)
+    out = []
+    for i, row in enumerate(rows):
+        out.append("| " + " | ".join(row + [""] * (width - len(row))) + " |")
+        if i == 0:
+            out.append("|" + "---|" * width)
+    return "\n".join(out)
+
+
+def _render_table(table) -> str:
+    return markdown_table([[_cell_text(cell) for cell in row if cell.tag in ("td", "th")]
+                           for row in table.iter("tr")])
+
+
+def _render(el) -> tuple:
+    """
+    Render a closed block element. Returns (markdown, spaced).
+    """
+    tag = el.tag
+    if tag == "table":
+        return _render_table(el), True
+    lines = _Lines()
+    _render_children(el, lines)
+    text = lines.result()
+    if tag in _HEADINGS and text:
+        return "#" * _HEADINGS[tag] + " " + " ".join(text.split("\n")), True
+    if tag == "li" and text:
+        return "- " + text.replace("\n", "\n  "), False
+    return text, False
+
+
+def _collapse(el, markdown: str, spaced: bool):
+    """
+    Replace el's subtree with its rendered markdown, keeping its tail.
+    """
+    tail = el.tail
+    el.clear()
+    el.tag = _RENDERED
+    el.text = markdown
+    if spaced:
+        el.set("spaced", "1")
+    el.tail = tail
+
+
+def convert_html(html: str) -> str:
+    """
+    Convert an HTML document (already decoded) to compact markdown.
+    """
+    if not html.strip():
+        return ""
+    parser = etree.HTMLPullParser(events=("end",), remove_comments=True, remove_pis=True)
+    root = None
+    for i in range(0, len(html), FEED_CHARS):
+        parser.feed(html[i:i + FEED_CHARS])
+        root = _handle_events(parser, root)
+    parser.close()
+    root = _handle_events(parser, root)
+    if root is None:
+        return ""
+    markdown = (root.text or "") if root.tag == _RENDERED else _render(root)[0]
+    logger.info("HTML converted: %d chars in, %d chars out (~%d tokens)",
+                len(html), len(markdown), len(markdown) // 4 + 1)
+    return markdown
+
+
+def _handle_events(parser, root):
+    for _event, el in parser.read_events():
+        tag = el.tag
+        if not isinstance(tag, str):
+            continue
+        if tag in _SKIP_TAGS:
+            _collapse(el, "", False)
+        elif tag in _BLOCK_TAGS:
+            markdown, spaced = _render(el)
+            _collapse(el, markdown, spaced)
+        if el.getparent() is None:
+            root = el
+    return root
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the lean HTML converter with markdownify.")
+    parser.add_argument("files", nargs="+", help="HTML files to convert.")
+    args = parser.parse_args()
+
+    from markdownify import markdownify as md
+    from utils import decode_html
+    for path in args.files:
+        with open(path, "rb") as f:
+            html = decode_html(f.read())
+        started = time.perf_counter()
+        lean = convert_html(html)
+        lean_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        full = md(html, heading_style="ATX")
+        full_seconds = time.perf_counter() - started
+        print(f"{path}: markdownify {len(full)} chars in {full_seconds:.3f}s, "
+              f"lean {len(lean)} chars in {lean_seconds:.3f}s "
+              f"({100 * (1 - len(lean) / max(len(full), 1)):.0f}% smaller)")
+
+
+if __name__ == "__main__":
+    main()
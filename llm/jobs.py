@@ -0,0 +1,134 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+from uuid import uuid4
+
+# Job queue settings. JOB_WORKERS jobs are processed at once and at most
+# JOB_MAX_QUEUE more may wait; finished jobs are kept for JOB_TTL_SECONDS so
+# clients can collect their results.
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 4))
+JOB_MAX_QUEUE = int(os.environ.get("JOB_MAX_QUEUE", 100))
+JOB_TTL_SECONDS = float(os.environ.get("JOB_TTL_SECONDS", 3600))
+
+TERMINAL_STATUSES = ("done", "failed")
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+@dataclass
+class Job:
+    id: str
+    filename: str
+    status: str = "queued"
+    stage: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    events: list = field(default_factory=list)
+    payload: Any = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def summary(self) -> dict:
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """
+    Local, in-memory job store with a fixed pool of asyncio workers.
+
+    The handler is awaited as handler(job, queue) and reports progress through
+    queue.update(); its return value becomes the job result.
+    """
+
+    def __init__(self, workers: int, max_queue: int, ttl_seconds: float):
+        self.workers = workers
+        self.ttl_seconds = ttl_seconds
+        self.jobs = {}
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._tasks = []
+
+    def start(self, handler: Callable[[Job, "JobQueue"], Awaitable[dict]]):
+        self._tasks = [asyncio.create_task(self._worker(handler)) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, filename: str, payload: Any) -> Job:
+        """
+        Queue a new job. Raises JobQueueFull if no more jobs may wait.
+        """
+        self._prune()
+        job = Job(id=str(uuid4()), filename=filename, payload=payload)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"{self._queue.qsize()} jobs already queued.")
+        self.jobs[job.id] = job
+        self.update(job, "queued")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def update(self, job: Job, stage: str, status: Optional[str] = None, **data):
+        """
+        Record a stage change and wake up anyone following the job's events.
+        """
+        job.stage = stage
+        if status:
+            job.status = status
+        job.updated_at = time.time()
+        job.events.append({"stage": stage, "status": job.status, "time": job.updated_at, **data})
+        job.changed.set()
+        job.changed = asyncio.Event()
+
+    async def follow(self, job: Job):
+        """
+        Yield the job's events as they happen, starting from the first one,
+        until the job finishes.
+        """
+        sent = 0
+        while True:
+            changed = job.changed
+            while sent < len(job.events):
+                yield job.events[sent]
+                sent += 1
+            if job.status in TERMINAL_STATUSES:
+                return
+            await changed.wait()
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl_seconds
+        for job_id in [j.id for j in self.jobs.values()
+                       if j.status in TERMINAL_STATUSES and j.updated_at < cutoff]:
+            del self.jobs[job_id]
+
+    async def _worker(self, handler):
+        while True:
+            job = await self._queue.get()
+            self.update(job, "started", status="running")
+            try:
+                job.result = await handler(job, self)
+                self.update(job, "done", status="done")
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                self.update(job, job.stage, status="failed", error=job.error)
+            finally:
+                job.payload = None
+                self._queue.task_done()
@@ -0,0 +1,101 @@
+import json
+from typing import List, Tuple
+
+# How much text may precede the opening brace (e.g. a ```json fence or a short
+# preamble) before the output is declared malformed.
+MAX_PREAMBLE_CHARS = 200
+
+_LITERAL_CHARS = set("0123456789-+.eEtruefalsn")
+_WHITESPACE = set(" \t\r\n")
+
+
+class MalformedJSON(ValueError):
+    """Raised as soon as streamed output can no longer be a valid JSON object."""
+
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON object that arrives in pieces, e.g. a streamed LLM response.
+
+    feed() returns the top-level (key, value) pairs whose values closed in the
+    text seen so far, so callers can use completed openEPD fields before the
+    whole object has been generated. Structural errors (stray characters,
+    mismatched brackets, members that do not parse) raise MalformedJSON
+    immediately instead of after the last token.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.fields = {}
+        self.done = False
+        self._pos = 0
+        self._start = None       # index of the opening brace
+        self._member_start = None
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, object]]:
+        """
+        Consume the next piece of text and return the fields it completed.
+        """
+        self.text += chunk
+        completed = []
+        text = self.text
+        i = self._pos
+        while i < len(text) and not self.done:
+            c = text[i]
+            if self._start is None:
+                if c == "{":
+                    self._start = i
+                    self._member_start = i + 1
+                    self._stack.append("{")
+                elif i >= MAX_PREAMBLE_CHARS:
+                    raise MalformedJSON("No JSON object found at the start of the output.")
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._stack.append(c)
+            elif c in "}]":
+                opener = self._stack.pop() if self._stack else None
+                if opener != ("{" if c == "}" else "["):
+                    raise MalformedJSON(f"Mismatched '{c}' at offset {i}.")
+                if not self._stack:
+                    self._close_member(i, completed)
+                    self.done = True
+            elif c == "," and len(self._stack) == 1:
+                self._close_member(i, completed)
+                self._member_start = i + 1
+            elif c not in _WHITESPACE and c != ":" and c != "," and c not in _LITERAL_CHARS:
+                raise MalformedJSON(f"Unexpected character {c!r} at offset {i}.")
+            i += 1
+        self._pos = i
+        return completed
+
+    def _close_member(self, end: int, completed: list):
+        member = self.text[self._member_start:end]
+        if not member.strip():
+            # Empty object, or a trailing comma before the closing brace.
+            return
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError as e:
+            raise MalformedJSON(f"Invalid field near offset {self._member_start}: {e.msg}")
+        for key, value in parsed.items():
+            self.fields[key] = value
+            completed.append((key, value))
+
+    def result(self) -> dict:
+        """
+        Return the parsed object. Raises MalformedJSON if it never closed.
+        """
+        if not self.done:
+            raise MalformedJSON("Output ended before the JSON object was closed.")
+        return self.fields
@@ -1,13 +1,190 @@
+import asyncio
 import os
+import hashlib
+import json
+import logging
+import tempfile
 from fastapi import FastAPI, File,UploadFile
-from uuid import uuid4
-from utils import pdf_to_markdown, html_to_markdown
+from fastapi.responses import JSONResponse, StreamingResponse
+from utils import pdf_to_markdown, html_to_markdown, pdf_page_count, close_async_client, CONVERTER_VERSION, HTML_CONVERTER, PDF_EXTRACT_MODE
+from executor import convert_executor, ExecutorBusy
+from conversion_cache import conversion_cache
+from jobs import JobQueue, JobQueueFull, JOB_WORKERS, JOB_MAX_QUEUE, JOB_TTL_SECONDS, TERMINAL_STATUSES
+from prompt_injection_handling import guard_document_for_llm
+from batch import llm_stages
+
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"),
+                    format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 
 app = FastAPI()
 
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Upload limits. Files up to SPOOL_THRESHOLD_BYTES are converted straight from
+# memory; larger ones are spooled to UPLOAD_DIR so they are not held in RAM.
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 50 * 1024 * 1024))
+SPOOL_THRESHOLD_BYTES = int(os.environ.get("SPOOL_THRESHOLD_BYTES", 16 * 1024 * 1024))
+MAX_PDF_PAGES = int(os.environ.get("MAX_PDF_PAGES", 1000))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadRejected(Exception):
+    """Raised when an upload fails a size or content check before parsing."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+def check_magic(head: bytes, file_type: str):
+    """
+    Check the first bytes of an upload against its extension.
+    """
+    if file_type == '.pdf':
+        # The PDF header may be preceded by junk, but must be in the first 1 KB.
+        if b"%PDF-" not in head[:1024]:
+            raise UploadRejected(415, "File does not look like a PDF.")
+    elif not head.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"<"):
+        raise UploadRejected(415, "File does not look like an HTML document.")
+
+
+async def read_upload(file: UploadFile, file_type: str):
+    """
+    Read an upload in chunks, enforcing MAX_UPLOAD_BYTES and the magic-byte check.
+
+    Returns:
+        tuple: (content, spool_path, digest). Exactly one of content and spool_path
+        is set: the bytes when the file fits under SPOOL_THRESHOLD_BYTES, otherwise
+        the path of a temp file. digest is the SHA-256 hex digest of the file.
+    """
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise UploadRejected(413, f"File exceeds the {MAX_UPLOAD_BYTES} byte limit.")
+
+    buffer = bytearray()
+    sha256 = hashlib.sha256()
+    spool = None
+    size = 0
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            if size == 0:
+                check_magic(chunk, file_type)
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise UploadRejected(413, f"File exceeds the {MAX_UPLOAD_BYTES} byte limit.")
+            sha256.update(chunk)
+            # Spool file I/O runs in a thread so large uploads don't block the event loop.
+            if spool is None and size > SPOOL_THRESHOLD_BYTES:
+                spool = await asyncio.to_thread(tempfile.NamedTemporaryFile, dir=UPLOAD_DIR,
+                                                suffix=file_type, delete=False)
+                await asyncio.to_thread(spool.write, buffer)
+                buffer = None
+            if spool is not None:
+                await asyncio.to_thread(spool.write, chunk)
+            else:
+                buffer.extend(chunk)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            os.remove(spool.name)
+        raise
+
+    if size == 0:
+        raise UploadRejected(400, "Uploaded file is empty.")
+    if spool is not None:
+        await asyncio.to_thread(spool.close)
+        return None, spool.name, sha256.hexdigest()
+    return bytes(buffer), None, sha256.hexdigest()
+
+
+def spool_upload(content: bytes, file_type: str) -> str:
+    """
+    Write upload bytes to a temp file in UPLOAD_DIR and return its path.
+    """
+    with tempfile.NamedTemporaryFile(dir=UPLOAD_DIR, suffix=file_type, delete=False) as spool:
+        spool.write(content)
+    return spool.name
+
+
+def check_pdf(source):
+    """
+    Reject PDFs that cannot be opened or exceed MAX_PDF_PAGES, before extracting any text.
+    """
+    try:
+        page_count = pdf_page_count(source)
+    except Exception:
+        raise UploadRejected(422, "PDF could not be opened.")
+    if page_count > MAX_PDF_PAGES:
+        raise UploadRejected(413, f"PDF has {page_count} pages; the limit is {MAX_PDF_PAGES}.")
+
+
+async def convert_source(source, file_type: str, digest: str, wait: bool = False) -> str:
+    """
+    Convert an upload to markdown through the conversion cache and the bounded executor.
+    """
+    kind = f"pdf-{PDF_EXTRACT_MODE}" if file_type == '.pdf' else f"html-{HTML_CONVERTER}"
+    cache_key = conversion_cache.key(digest, kind, CONVERTER_VERSION)
+    # Cache reads, writes and eviction touch the disk, so they run in a thread.
+    cached = await asyncio.to_thread(conversion_cache.get, cache_key)
+    if cached is not None:
+        return cached
+
+    # Conversion is CPU-bound, so run it on the bounded executor to keep
+    # the event loop free for other requests.
+    converter = pdf_to_markdown if file_type == '.pdf' else html_to_markdown
+    markdown_content = await convert_executor.run(converter, source, wait=wait)
+    # The converters return "" when they fail; that is not cached, so the
+    # document is converted again on the next upload.
+    if markdown_content.strip():
+        await asyncio.to_thread(conversion_cache.put, cache_key, markdown_content)
+    return markdown_content
+
+
+async def run_job(job, queue) -> dict:
+    """
+    Job handler: convert, guard and extract openEPD from a queued upload.
+    """
+    payload = job.payload
+    try:
+        queue.update(job, "converting")
+        markdown = await convert_source(payload["spool_path"], payload["type"], payload["digest"], wait=True)
+    finally:
+        os.remove(payload["spool_path"])
+
+    queue.update(job, "guarding")
+    markdown, guard = await convert_executor.run(guard_document_for_llm, markdown, wait=True)
+
+    record = {"seconds": {}}
+    openepd = await llm_stages(markdown, record, on_stage=lambda stage: queue.update(job, stage))
+    return {
+        "is_epd": record["status"] != "not_epd",
+        "check_reply": record["check_reply"],
+        "openepd": openepd,
+        "validation_errors": record.get("validation_errors", []),
+        "guard": guard,
+    }
+
+
+job_queue = JobQueue(JOB_WORKERS, JOB_MAX_QUEUE, JOB_TTL_SECONDS)
+
+@app.on_event("startup")
+def start_job_workers():
+    job_queue.start(run_job)
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    await job_queue.stop()
+    await close_async_client()
+    convert_executor.shutdown()
+
+@app.get("/cache_stats/")
+def cache_stats():
+    """
+    Report hit/miss counters and size of the conversion cache.
+    """
+    return conversion_cache.stats()
+
 @app.post("/upload_epd/")
 async def upload_epd(file: UploadFile = File(...)):
     """
@@ -20,30 +197,108 @@ async def upload_epd(file: UploadFile = File(...)):
         dict: A dictionary containing the filename and the converted Markdown content.
     """
     allowed_filetypes = ('.pdf', '.htm', '.html')
-    if not file.filename.endswith(allowed_filetypes):
+    if not file.filename.lower().endswith(allowed_filetypes):
         return {"error": "Only PDF or HTML files are allowed."}
-    
-    file_id = str(uuid4())
-    type = os.path.splitext(file.filename)[1]
-    file_path = os.path.join(UPLOAD_DIR, f"{file_id}{type}")
-    
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
-    
+
+    type = os.path.splitext(file.filename)[1].lower()
+    spool_path = None
     try:
-        if type.lower() == '.pdf':
-            markdown_content = pdf_to_markdown(file_path)
-        elif type.lower() in ['.htm', '.html']:
-            markdown_content = html_to_markdown(file_path)
-    except Exception as e:
-        return {"error": "Unsupported file type."}
+        content, spool_path, digest = await read_upload(file, type)
+        source = content if content is not None else spool_path
+
+        if type == '.pdf':
+            # Opening the PDF parses it, so keep that off the event loop too.
+            await asyncio.to_thread(check_pdf, source)
+        markdown_content = await convert_source(source, type, digest)
+    except UploadRejected as e:
+        return JSONResponse(status_code=e.status_code, content={"error": e.message})
+    except ExecutorBusy:
+        return JSONResponse(status_code=503, content={"error": "Server is busy converting other documents. Please try again shortly."})
     except Exception as e:
-        return JSONResponse(status_code=500, contact={"error": str(e)})
+        return JSONResponse(status_code=500, content={"error": str(e)})
     finally:
-        os.remove(file_path)
+        if spool_path:
+            os.remove(spool_path)
     
     return {
         "content": markdown_content
     }
 
+
+@app.post("/jobs/", status_code=202)
+async def submit_job(file: UploadFile = File(...)):
+    """
+    Queue a PDF/HTML EPD for conversion to openEPD.
+
+    Returns:
+        dict: The job id and status. Poll /jobs/{job_id}, or follow
+        /jobs/{job_id}/events, until the job is done, then fetch /jobs/{job_id}/result.
+    """
+    allowed_filetypes = ('.pdf', '.htm', '.html')
+    if not file.filename.lower().endswith(allowed_filetypes):
+        return JSONResponse(status_code=415, content={"error": "Only PDF or HTML files are allowed."})
+
+    type = os.path.splitext(file.filename)[1].lower()
+    spool_path = None
+    try:
+        content, spool_path, digest = await read_upload(file, type)
+        if spool_path is None:
+            # Queued jobs can wait a long time, so their uploads are kept on
+            # disk rather than in memory, whatever their size.
+            spool_path = await asyncio.to_thread(spool_upload, content, type)
+            content = None
+        if type == '.pdf':
+            await asyncio.to_thread(check_pdf, spool_path)
+        job = job_queue.submit(file.filename, {"spool_path": spool_path, "type": type, "digest": digest})
+    except UploadRejected as e:
+        if spool_path:
+            os.remove(spool_path)
+        return JSONResponse(status_code=e.status_code, content={"error": e.message})
+    except JobQueueFull:
+        if spool_path:
+            os.remove(spool_path)
+        return JSONResponse(status_code=503, content={"error": "Too many queued jobs. Please try again shortly."})
+    return job.summary()
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    """
+    Report a job's status and current stage.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown job."})
+    return job.summary()
+
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    """
+    Return the result of a finished job.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown job."})
+    if job.status == "failed":
+        return JSONResponse(status_code=500, content={"error": job.error})
+    if job.status != "done":
+        return JSONResponse(status_code=409, content={"error": f"Job is still {job.status}.", "stage": job.stage})
+    return job.result
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Stream a job's stage changes as server-sent events until it finishes.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown job."})
+
+    async def event_stream():
+        async for event in job_queue.follow(job):
+            name = event["status"] if event["status"] in TERMINAL_STATUSES else "stage"
+            yield f"event: {name}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
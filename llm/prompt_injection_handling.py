@@ -1,16 +1,39 @@
+import bisect
+import json
+import logging
+import os
 import re
 import unicodedata
+from collections import Counter
+from itertools import accumulate
 from typing import Dict, List, Tuple
 
+logger = logging.getLogger(__name__)
+
+# What the guard logs per document: "off", "summary" (score and per-pattern
+# counts), "snippets" (summary plus up to GUARD_LOG_MAX_SNIPPETS snippets).
+# The document text itself is never logged.
+GUARD_LOG_LEVEL = os.environ.get("GUARD_LOG_LEVEL", "snippets")
+GUARD_LOG_MAX_SNIPPETS = int(os.environ.get("GUARD_LOG_MAX_SNIPPETS", 5))
+GUARD_SNIPPET_CHARS = 120
+
 # --- 1) Normalization: remove sneaky characters & normalize unicode ---
 ZERO_WIDTH = r"[\u200B-\u200F\u202A-\u202E\u2060-\u206F\uFEFF]"  # zws, rtl/ltr marks, etc.
 
+_ZERO_WIDTH_REGEX = re.compile(ZERO_WIDTH)
+# Same result as [ \t]+ -> " ", without rewriting every single space.
+_SPACE_RUN_REGEX = re.compile(r" [ \t]+|\t[ \t]*")
+# Same result as \r?\n\s*\n+ -> "\n\n" once a preceding \r is dropped (see normalize_text).
+_BLANK_LINES_REGEX = re.compile(r"\n\s*\n+")
+
 def normalize_text(s: str) -> str:
     s = unicodedata.normalize("NFKC", s)
-    s = re.sub(ZERO_WIDTH, "", s)
+    s = _ZERO_WIDTH_REGEX.sub("", s)
     # collapse excessive whitespace
-    s = re.sub(r"[ \t]+", " ", s)
-    s = re.sub(r"\r?\n\s*\n+", "\n\n", s)
+    s = _SPACE_RUN_REGEX.sub(" ", s)
+    # A leading \n lets the regex engine jump between newlines; the optional
+    # \r of a CRLF blank line is folded in afterwards.
+    s = _BLANK_LINES_REGEX.sub("\n\n", s).replace("\r\n\n", "\n\n")
     return s.strip()
 
 # --- 2) Injection patterns: phrases/structures we don't allow ---
@@ -42,53 +65,257 @@ INJECTION_PATTERNS = [
 
 INJECTION_REGEXES = [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in INJECTION_PATTERNS]
 
+# Literal text every match of a pattern must start with (case-insensitively),
+# parallel to INJECTION_PATTERNS. The literals are located first and the full
+# regex only runs where one occurs. The base64 pattern has no literal; it only
+# runs on runs of 100+ base64 characters.
+PATTERN_TRIGGERS = [
+    ("ignore ",),
+    ("override ",),
+    ("disregard ",),
+    ("forget ",),
+    ("reset ",),
+    ("from now on",),
+    ("you are now ",),
+    ("pretend to be",),
+    ("ignore ",),
+    ("do not follow ",),
+    ("output ",),
+    ("exfiltrate", "leak", "data exfiltration"),
+    ("change ",),
+    ("role:",),
+    ("assistant:", "system:", "developer:"),
+    ("begin ",),
+    ("tool_call", "function_call"),
+    ("```",),
+    ("http",),
+    ("gist.github", "pastebin.com", "drive.google", "dropbox.com"),
+    ("data:text/plain;base64,",),
+    None,
+]
+
+_TRIGGER_LITERALS = list(dict.fromkeys(t for triggers in PATTERN_TRIGGERS if triggers for t in triggers))
+_LONG_RUN_REGEX = re.compile(r"(?<![a-z0-9+/=])[a-z0-9+/=]{100,}")
+# Literals are located with str.find in a lowercased copy of the text, which is
+# several times faster than one case-insensitive alternation in the re module.
+# These are the non-ASCII characters re.IGNORECASE treats as an ASCII letter.
+_CASE_FOLD = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k"})
+
+
+def _find_all(find, literal: str) -> List[int]:
+    """
+    Every start position of literal, overlapping occurrences included.
+    """
+    positions = []
+    i = find(literal, 0)
+    while i != -1:
+        positions.append(i)
+        i = find(literal, i + 1)
+    return positions
+
+
+class InjectionScan:
+    """
+    One pass over a document that detection and redaction both reuse.
+
+    The text is normalized once and the trigger literals of all patterns are
+    located once. Results are identical to running every regex over the whole
+    normalized text, and every regex over every line for redaction.
+    """
+
+    def __init__(self, text: str):
+        self.text = normalize_text(text or "")
+        self._candidates = self._find_candidates()
+        self._matches = None
+
+    def _find_candidates(self) -> List[List[Tuple[int, int]]]:
+        """
+        (start, stop) windows per pattern. stop is None for a literal hit, where
+        a match can only start exactly at start.
+        """
+        text = self.text
+        folded = text.translate(_CASE_FOLD).lower()
+        if len(folded) == len(text):
+            find = folded.find
+            long_run_regex = _LONG_RUN_REGEX
+        else:
+            # Lowercasing changed offsets; search the text itself, case-insensitively.
+            folded = text
+
+            def find(literal, pos):
+                m = re.compile(re.escape(literal), re.IGNORECASE).search(text, pos)
+                return m.start() if m else -1
+            long_run_regex = re.compile(r"(?<![A-Za-z0-9+/=])[A-Za-z0-9+/=]{100,}", re.IGNORECASE)
+        hits = {literal: _find_all(find, literal) for literal in _TRIGGER_LITERALS}
+        runs = None
+        candidates = []
+        for triggers in PATTERN_TRIGGERS:
+            if triggers is None:
+                if runs is None:
+                    runs = [(r.start(), min(len(text), r.end() + 1)) for r in long_run_regex.finditer(folded)]
+                candidates.append(runs)
+            else:
+                positions = sorted(p for t in triggers for p in hits[t])
+                candidates.append([(p, None) for p in positions])
+        return candidates
+
+    def matches(self) -> List[Tuple[str, int, int]]:
+        """
+        (pattern, start, end) of every match, in the order the per-pattern finditer loop produced them.
+        """
+        if self._matches is None:
+            text = self.text
+            self._matches = []
+            for rx, candidates in zip(INJECTION_REGEXES, self._candidates):
+                end = 0
+                for start, stop in candidates:
+                    if start < end:
+                        continue
+                    if stop is None:
+                        found = [m] if (m := rx.match(text, start)) else []
+                    else:
+                        found = rx.finditer(text, start, stop)
+                    for m in found:
+                        self._matches.append((rx.pattern, m.start(), m.end()))
+                        end = m.end()
+        return self._matches
+
+    def report(self) -> Dict:
+        norm = self.text
+        matches: List[Tuple[str, str]] = []
+        for pattern, start, end in self.matches():
+            # capture a small snippet for logs
+            snippet = norm[max(0, start - 40):min(len(norm), end + 40)]
+            matches.append((pattern, snippet))
+        # simple scoring: number of unique patterns matched, capped
+        score = min(100, len(matches) * 10)
+        return {
+            "is_suspicious": score >= 10,
+            "score": score,
+            "match_count": len(matches),
+            "matches": matches,
+            "normalized_text": norm,
+        }
+
+    def redact(self) -> str:
+        text = self.text
+        lines = text.splitlines()
+        starts = list(accumulate(map(len, text.splitlines(keepends=True)), initial=0))
+        redacted = set()
+        for rx, candidates in zip(INJECTION_REGEXES, self._candidates):
+            for start, stop in candidates:
+                line = bisect.bisect_right(starts, start) - 1
+                if line in redacted:
+                    continue
+                # Bounding the match by the line end makes it behave like a search of that line alone.
+                line_end = starts[line] + len(lines[line])
+                if stop is None:
+                    found = rx.match(text, start, line_end)
+                else:
+                    found = rx.search(text, start, min(stop, line_end))
+                if found:
+                    redacted.add(line)
+        for line in redacted:
+            lines[line] = "[[redacted: potential prompt-injection line removed]]"
+        return "\n".join(lines).strip()
+
+
 # --- 3) Detector: returns score + matches for logging/decisions ---
 def detect_prompt_injection(text: str) -> Dict:
-    raw = text or ""
-    norm = normalize_text(raw)
-    matches: List[Tuple[str, str]] = []
-    for rx in INJECTION_REGEXES:
-        for m in rx.finditer(norm):
-            # capture a small snippet for logs
-            start = max(0, m.start() - 40)
-            end   = min(len(norm), m.end() + 40)
-            snippet = norm[start:end]
-            matches.append((rx.pattern, snippet))
-    # simple scoring: number of unique patterns matched, capped
+    return InjectionScan(text).report()
+
+# --- 4) Redactor: removes/neutralizes lines containing injection cues ---
+def redact_injection(text: str) -> str:
+    return InjectionScan(text).redact()
+
+# --- 5) Gate: one call to use before sending to the LLM ---
+def guard_report(scan: InjectionScan, threshold: int, max_snippets: int = GUARD_LOG_MAX_SNIPPETS) -> Dict:
+    """
+    Compact, JSON-serializable summary of a scan, safe to log or store.
+    Holds per-pattern match counts and at most max_snippets short snippets, never the document.
+    """
+    matches = scan.matches()
     score = min(100, len(matches) * 10)
+    snippets = []
+    for pattern, start, end in matches[:max_snippets]:
+        snippet = scan.text[max(0, start - 40):min(len(scan.text), end + 40)]
+        snippets.append({"pattern": pattern, "snippet": snippet[:GUARD_SNIPPET_CHARS]})
     return {
         "is_suspicious": score >= 10,
         "score": score,
+        "threshold": threshold,
+        "redacted": score >= threshold,
         "match_count": len(matches),
-        "matches": matches,
-        "normalized_text": norm,
+        "pattern_counts": dict(Counter(pattern for pattern, _, _ in matches)),
+        "snippets": snippets,
+        "text_chars": len(scan.text),
     }
 
-# --- 4) Redactor: removes/neutralizes lines containing injection cues ---
-def redact_injection(text: str) -> str:
-    norm = normalize_text(text or "")
-    lines = norm.splitlines()
-    keep: List[str] = []
-    for ln in lines:
-        if any(rx.search(ln) for rx in INJECTION_REGEXES):
-            # drop or neutralize the line entirely
-            keep.append("[[redacted: potential prompt-injection line removed]]")
-        else:
-            keep.append(ln)
-    cleaned = "\n".join(keep).strip()
-    # Optional: hard fence all content as data
-    return cleaned
 
-# --- 5) Gate: one call to use before sending to the LLM ---
+def log_guard_report(report: Dict, level: str = GUARD_LOG_LEVEL):
+    if level == "off":
+        return
+    if level == "summary":
+        report = {k: v for k, v in report.items() if k != "snippets"}
+    logger.log(logging.WARNING if report["is_suspicious"] else logging.INFO,
+               "prompt-injection guard: %s", json.dumps(report, ensure_ascii=False))
+
+
 def guard_document_for_llm(doc_text: str, threshold: int = 20) -> Tuple[str, Dict]:
     """
-    Returns (clean_text, report). If report['is_suspicious'] and score >= threshold,
-    the redacted text is returned; else the normalized text.
+    Returns (clean_text, report). If the score reaches threshold the redacted
+    text is returned, otherwise the normalized text. report is guard_report()
+    of the scan and is logged according to GUARD_LOG_LEVEL.
+    """
+    scan = InjectionScan(doc_text)
+    report = guard_report(scan, threshold)
+    log_guard_report(report)
+    if report["redacted"]:
+        return scan.redact(), report
+    return scan.text, report
+
+
+class StreamingGuard:
     """
-    # print(doc_text)
-    report = detect_prompt_injection(doc_text)
-    print(report)
-    if report["score"] >= threshold:
-        return redact_injection(doc_text), report
-    else:
-        return report["normalized_text"]
+    Guards a document that arrives in pieces (pages, chunks) one piece at a time.
+
+    Each piece is normalized and scanned on its own. Once the score of the
+    document so far reaches threshold, that piece and every later piece with
+    a match is redacted; pieces already returned are not revisited. report()
+    gives the same compact report as guard_document_for_llm for the whole
+    document.
+    """
+
+    def __init__(self, threshold: int = 20, max_snippets: int = GUARD_LOG_MAX_SNIPPETS):
+        self.threshold = threshold
+        self.max_snippets = max_snippets
+        self._counts = Counter()
+        self._snippets = []
+        self._match_count = 0
+        self._chars = 0
+        self._redacted = False
+
+    def feed(self, text: str) -> str:
+        scan = InjectionScan(text)
+        piece = guard_report(scan, self.threshold, self.max_snippets - len(self._snippets))
+        self._counts.update(piece["pattern_counts"])
+        self._snippets.extend(piece["snippets"])
+        self._match_count += piece["match_count"]
+        self._chars += piece["text_chars"]
+        if piece["match_count"] and min(100, self._match_count * 10) >= self.threshold:
+            self._redacted = True
+            return scan.redact()
+        return scan.text
+
+    def report(self) -> Dict:
+        score = min(100, self._match_count * 10)
+        return {
+            "is_suspicious": score >= 10,
+            "score": score,
+            "threshold": self.threshold,
+            "redacted": self._redacted,
+            "match_count": self._match_count,
+            "pattern_counts": dict(self._counts),
+            "snippets": list(self._snippets),
+            "text_chars": self._chars,
+        }
@@ -0,0 +1,300 @@
+"""
+Targeted repair of openEPD JSON that fails to parse or validate.
+
+Repair happens in three steps, cheapest first:
+1. Local text fixes so the output parses: code fences, trailing commas,
+   numbers with leading zeros, and brackets or strings left open by a
+   truncated generation.
+2. Local type fixes: numeric strings ("1,234.5", "2.1E-5") are coerced
+   wherever the schema expects a number.
+3. Only the fields that still fail schema validation are sent back to the
+   LLM, identified by JSON pointer and paired with a matching excerpt of the
+   document. This is repeated for at most REPAIR_MAX_ROUNDS rounds.
+"""
+import json
+import os
+import re
+from typing import Tuple, Union
+
+from prompts import repair_prompt
+from utils import ask_rchat, ask_rchat_async, extract_first_json, sanitize_json
+from validation import OPENEPD_SCHEMA, pointer_tokens, validation_errors
+
+REPAIR_MAX_ROUNDS = int(os.environ.get("REPAIR_MAX_ROUNDS", 2))
+REPAIR_MAX_FIELDS = int(os.environ.get("REPAIR_MAX_FIELDS", 20))
+REPAIR_EXCERPT_CHARS = int(os.environ.get("REPAIR_EXCERPT_CHARS", 1500))
+
+# Values the extraction prompt tells the model to use for missing data. Fields
+# holding them are reported but not re-asked: the document has no value to give.
+_MISSING = (None, "--")
+
+_STRING_LITERAL = re.compile(r'"(?:\\.|[^"\\])*"')
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_LEADING_ZEROS = re.compile(r"(?<=[:\[,\s])(-?)0+(?=\d)")
+_CLOSING_FENCE = re.compile(r"\s*```\s*$")
+_NUMERIC = re.compile(r"^[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?$")
+
+
+# --- 1) Local text fixes ---
+
+def _outside_strings(text: str, fn) -> str:
+    """
+    Apply fn to every part of text that is not inside a JSON string literal.
+    """
+    parts = []
+    last = 0
+    for m in _STRING_LITERAL.finditer(text):
+        parts.append(fn(text[last:m.start()]))
+        parts.append(m.group(0))
+        last = m.end()
+    parts.append(fn(text[last:]))
+    return "".join(parts)
+
+
+def _open_brackets(text: str) -> tuple:
+    """
+    Scan JSON text and return (stack of closing brackets still owed, whether it ends inside a string).
+    """
+    stack = []
+    in_string = escape = False
+    for c in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]" and stack:
+            stack.pop()
+    return stack, in_string
+
+
+def _close_truncated(text: str) -> str:
+    """
+    Close strings and brackets left open when the generation was cut off.
+    """
+    stack, in_string = _open_brackets(text)
+    if in_string:
+        text += '"'
+    if not stack:
+        return text
+    text = text.rstrip().rstrip(",")
+    if text.endswith(":"):
+        text += " null"
+    return text + "".join(reversed(stack))
+
+
+def local_fix_json(text: str) -> str:
+    """
+    Apply cheap textual fixes so that slightly malformed model output parses.
+
+    Balanced output is cut to its JSON object, dropping fences and trailing
+    prose. Truncated output keeps everything from the first "{" and has its
+    brackets closed, so fields after the last nested object survive:
+
+    >>> local_fix_json('{"a": {"b": 1}, "c": "xy')
+    '{"a": {"b": 1}, "c": "xy"}'
+    >>> local_fix_json('{"a": {"b": 1}, "c": 5,')
+    '{"a": {"b": 1}, "c": 5}'
+    """
+    start = text.find("{")
+    candidate = _CLOSING_FENCE.sub("", text[start:]) if start != -1 else text
+    stack, in_string = _open_brackets(candidate)
+    if stack or in_string:
+        text = _close_truncated(candidate)
+    else:
+        text = extract_first_json(text)
+    text = _outside_strings(text, lambda s: _LEADING_ZEROS.sub(r"\1", _TRAILING_COMMA.sub(r"\1", s)))
+    return text
+
+
+def parse_openepd(text: str) -> dict:
+    """
+    Parse model output into a sanitized dict, applying local fixes only if needed.
+    Raises json.JSONDecodeError if it cannot be repaired locally.
+    """
+    try:
+        parsed = json.loads(extract_first_json(text))
+    except json.JSONDecodeError:
+        parsed = json.loads(local_fix_json(text))
+    return sanitize_json(parsed)
+
+
+# --- 2) Local type fixes ---
+
+def _schema_types(schema: dict) -> tuple:
+    types = schema.get("type", ())
+    return (types,) if isinstance(types, str) else tuple(types)
+
+
+def coerce_types(value, schema: dict):
+    """
+    Convert numeric strings to numbers wherever the schema asks for a number.
+    """
+    types = _schema_types(schema)
+    if isinstance(value, str) and ("number" in types or "integer" in types):
+        candidate = value.strip().replace(",", "").replace(" ", "")
+        if _NUMERIC.match(candidate):
+            number = float(candidate)
+            return int(number) if "integer" in types and number.is_integer() else number
+        return value
+    if isinstance(value, dict):
+        props = schema.get("properties", {})
+        extra = schema.get("additionalProperties")
+        return {k: coerce_types(v, props.get(k, extra if isinstance(extra, dict) else {}))
+                for k, v in value.items()}
+    if isinstance(value, list) and isinstance(schema.get("items"), dict):
+        return [coerce_types(v, schema["items"]) for v in value]
+    return value
+
+
+# --- 3) Pointer-level LLM repair ---
+
+def get_pointer(doc, pointer: str):
+    for token in pointer_tokens(pointer):
+        if isinstance(doc, list):
+            doc = doc[int(token)]
+        elif isinstance(doc, dict) and token in doc:
+            doc = doc[token]
+        else:
+            return None
+    return doc
+
+
+def set_pointer(doc: dict, pointer: str, value):
+    """
+    Set the value at pointer and return the document. The root pointer ""
+    replaces the whole document, so the returned value is the new document.
+    """
+    tokens = pointer_tokens(pointer)
+    if not tokens:
+        return value
+    target = doc
+    for token in tokens[:-1]:
+        if isinstance(target, list):
+            target = target[int(token)]
+        else:
+            target = target.setdefault(token, {})
+    if isinstance(target, list):
+        target[int(tokens[-1])] = value
+    else:
+        target[tokens[-1]] = value
+    return doc
+
+
+def schema_at(pointer: str) -> dict:
+    schema = OPENEPD_SCHEMA
+    for token in pointer_tokens(pointer):
+        if "properties" in schema and token in schema["properties"]:
+            schema = schema["properties"][token]
+        elif isinstance(schema.get("additionalProperties"), dict):
+            schema = schema["additionalProperties"]
+        elif isinstance(schema.get("items"), dict):
+            schema = schema["items"]
+        else:
+            return {}
+    return schema
+
+
+def _needs_llm(error: dict) -> bool:
+    return error["missing"] or error["value"] not in _MISSING
+
+
+def _excerpt(markdown: str, pointer: str) -> str:
+    """
+    Find the part of the document most likely to hold the value at pointer.
+    """
+    terms = [t for t in pointer_tokens(pointer)
+             if not t.isdigit() and t not in ("mean", "unit", "qty") and not re.match(r"^A\d", t)]
+    lowered = markdown.lower()
+    for term in reversed(terms):
+        for candidate in (term.replace("_", " "), *term.split("_")):
+            if len(candidate) < 2:
+                continue
+            index = lowered.find(candidate.lower())
+            if index != -1:
+                start = max(0, index - REPAIR_EXCERPT_CHARS // 2)
+                return markdown[start:start + REPAIR_EXCERPT_CHARS]
+    return markdown[:REPAIR_EXCERPT_CHARS]
+
+
+def build_repair_messages(doc: dict, errors: list, markdown: str) -> list:
+    fields = []
+    for error in errors:
+        fields.append(
+            f"Pointer: {error['pointer']}\n"
+            f"Error: {error['message']}\n"
+            f"Current value: {json.dumps(get_pointer(doc, error['pointer']))}\n"
+            f"Expected schema: {json.dumps(schema_at(error['pointer']), separators=(',', ':'))}\n"
+            f"<EPD_Excerpt>\n{_excerpt(markdown, error['pointer'])}\n</EPD_Excerpt>"
+        )
+    return [
+        {"role": "system", "content": repair_prompt},
+        {"role": "user", "content": "\n\n".join(fields)}
+    ]
+
+
+def _apply_fixes(doc: dict, errors: list, reply: str) -> dict:
+    try:
+        fixes = json.loads(local_fix_json(reply))
+    except json.JSONDecodeError:
+        return doc
+    if not isinstance(fixes, dict):
+        return doc
+    requested = {e["pointer"] for e in errors}
+    for pointer, value in fixes.items():
+        # The document itself must stay an object.
+        if pointer in requested and (pointer or isinstance(value, dict)):
+            doc = set_pointer(doc, pointer, value)
+    return coerce_types(sanitize_json(doc), OPENEPD_SCHEMA)
+
+
+def _prepare(output: Union[str, dict]) -> dict:
+    doc = parse_openepd(output) if isinstance(output, str) else output
+    return coerce_types(doc, OPENEPD_SCHEMA)
+
+
+def _to_repair(errors: list) -> list:
+    return [e for e in errors if _needs_llm(e)][:REPAIR_MAX_FIELDS]
+
+
+def repair_openepd(output: Union[str, dict], markdown: str, max_rounds: int = REPAIR_MAX_ROUNDS) -> Tuple[dict, list]:
+    """
+    Parse, locally fix and, if needed, LLM-repair an openEPD extraction.
+
+    Returns:
+        tuple: (document, remaining validation errors).
+    Raises:
+        json.JSONDecodeError: If the output cannot be parsed even after local fixes.
+    """
+    doc = _prepare(output)
+    errors = validation_errors(doc)
+    for _ in range(max_rounds):
+        pending = _to_repair(errors)
+        if not pending:
+            break
+        reply = ask_rchat(build_repair_messages(doc, pending, markdown))
+        doc = _apply_fixes(doc, pending, reply)
+        errors = validation_errors(doc)
+    return doc, errors
+
+
+async def repair_openepd_async(output: Union[str, dict], markdown: str, max_rounds: int = REPAIR_MAX_ROUNDS) -> Tuple[dict, list]:
+    """
+    Async version of repair_openepd.
+    """
+    doc = _prepare(output)
+    errors = validation_errors(doc)
+    for _ in range(max_rounds):
+        pending = _to_repair(errors)
+        if not pending:
+            break
+        reply = await ask_rchat_async(build_repair_messages(doc, pending, markdown))
+        doc = _apply_fixes(doc, pending, reply)
+        errors = validation_errors(doc)
+    return doc, errors
@@ -0,0 +1,245 @@
+"""
+Rules-based extraction of the openEPD impact, resource-use and output-flow matrices.
+
+The LCIA and inventory tables of an EPD are already structured: one row per
+indicator (GWP-100, ODP, EP, AP, POCP, RPRe, NRPRe, HWD, ...) and one column
+per module (A1, A2, A3, A1-A3). When the document markdown holds them as
+markdown tables (the layout PDF mode and the lean HTML converter produce
+these), they are read here directly instead of having the LLM regenerate
+every number. The indicator vocabulary is the one used by asphalt_db.py's
+table4Cols-table9Cols.
+
+extract_matrices returns only the fields it found, so the LLM is still asked
+for any matrix that is missing or incomplete (the table values then take
+precedence over its answer), and always for the metadata.
+"""
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+# "rules" reads the matrices from the markdown tables when it can;
+# "llm" always asks the LLM for them.
+IMPACT_TABLES = os.environ.get("IMPACT_TABLES", "rules")
+
+# Impact method used as the key under "impacts" when the document does not name one.
+DEFAULT_IMPACT_METHOD = "TRACI 2.1"
+
+# Abbreviations, lowercased and with spaces, dashes and underscores removed,
+# mapped to (openEPD field, indicator key). Keys follow the extraction prompt's template.
+INDICATOR_ABBREVIATIONS = {
+    "gwp": ("impacts", "gwp"), "gwp100": ("impacts", "gwp"), "gwptotal": ("impacts", "gwp"),
+    "odp": ("impacts", "odp"), "opd": ("impacts", "odp"),
+    "ep": ("impacts", "ep"),
+    "ap": ("impacts", "ap"),
+    "pocp": ("impacts", "pocp"), "sfp": ("impacts", "pocp"),
+    "gwpbiogenic": ("impacts", "gwp_biogenic"), "gwpbio": ("impacts", "gwp_biogenic"),
+    "gwpluluc": ("impacts", "gwp_luluc"), "ghgluc": ("impacts", "gwp_luluc"),
+    "rpre": ("resource_uses", "rpre"),
+    "rprm": ("resource_uses", "RPRm"),
+    "nrpre": ("resource_uses", "nrpre"),
+    "nrprm": ("resource_uses", "nrprm"),
+    "sm": ("resource_uses", "sm"),
+    "rsf": ("resource_uses", "rsf"),
+    "nrsf": ("resource_uses", "nrsf"),
+    "re": ("resource_uses", "re"),
+    "fw": ("resource_uses", "fw"),
+    "hwd": ("output_flows", "hwd"),
+    "nhwd": ("output_flows", "nhwd"),
+    "rwdhl": ("output_flows", "hlrw"), "hlrw": ("output_flows", "hlrw"),
+    "rwdll": ("output_flows", "illrw"), "illrw": ("output_flows", "illrw"),
+    "cru": ("output_flows", "cru"),
+    "mfr": ("output_flows", "mfr"), "mr": ("output_flows", "mfr"),
+    "mfer": ("output_flows", "mer"), "mer": ("output_flows", "mer"),
+    "ree": ("output_flows", "ee"), "ee": ("output_flows", "ee"),
+}
+
+# Indicator names written out, matched as prefixes of the lowercased row label,
+# most specific first ("non-hazardous" before "hazardous").
+INDICATOR_NAMES = [
+    ("global warming potential", ("impacts", "gwp")),
+    ("ozone depletion", ("impacts", "odp")),
+    ("eutrophication", ("impacts", "ep")),
+    ("acidification", ("impacts", "ap")),
+    ("smog formation", ("impacts", "pocp")),
+    ("photochemical ozone", ("impacts", "pocp")),
+    ("renewable primary energy used as energy", ("resource_uses", "rpre")),
+    ("renewable primary energy resources used as energy", ("resource_uses", "rpre")),
+    ("renewable primary resources used as material", ("resource_uses", "RPRm")),
+    ("renewable primary energy resources used as material", ("resource_uses", "RPRm")),
+    ("non-renewable primary energy used as energy", ("resource_uses", "nrpre")),
+    ("non-renewable primary energy resources used as energy", ("resource_uses", "nrpre")),
+    ("non-renewable primary resources used as material", ("resource_uses", "nrprm")),
+    ("non-renewable primary energy resources used as material", ("resource_uses", "nrprm")),
+    ("secondary material", ("resource_uses", "sm")),
+    ("renewable secondary fuel", ("resource_uses", "rsf")),
+    ("non-renewable secondary fuel", ("resource_uses", "nrsf")),
+    ("recovered energy exported", ("output_flows", "ee")),
+    ("recovered energy", ("resource_uses", "re")),
+    ("net fresh water", ("resource_uses", "fw")),
+    ("consumption of fresh water", ("resource_uses", "fw")),
+    ("non-hazardous waste", ("output_flows", "nhwd")),
+    ("hazardous waste", ("output_flows", "hwd")),
+    ("high-level radioactive waste", ("output_flows", "hlrw")),
+    ("intermediate and low-level radioactive waste", ("output_flows", "illrw")),
+    ("components for re-use", ("output_flows", "cru")),
+    ("components for reuse", ("output_flows", "cru")),
+    ("materials for recycling", ("output_flows", "mfr")),
+    ("materials for energy recovery", ("output_flows", "mer")),
+    ("exported energy", ("output_flows", "ee")),
+]
+
+# Module column headers, normalized like the abbreviations.
+# A bare "Total" column is not listed: it may sum more life-cycle stages than A1-A3.
+MODULES = {"a1": "A1", "a2": "A2", "a3": "A3", "a1a3": "A1A2A3", "a1a2a3": "A1A2A3", "a1toa3": "A1A2A3",
+           "totala1a3": "A1A2A3", "totala1a2a3": "A1A2A3"}
+
+_MATRIX_FIELDS = ("impacts", "resource_uses", "output_flows")
+
+_TABLE_LINE = re.compile(r"^\s*\|.*\|\s*$")
+_SEPARATOR_CELL = re.compile(r"^:?-{3,}:?$")
+_CELL_SPLIT = re.compile(r"(?<!\\)\|")
+_KEY_CHARS = re.compile(r"[\s\-‐-―_/.,()\[\]]+")
+_GROUPS = re.compile(r"[(\[]([^()\[\]]*)[)\]]")
+_NUMBER = re.compile(r"^[-+−]?(\d{1,3}(,\d{3})+|\d+)?(\.\d+)?([eE][-+−]?\d+)?$")
+_SCIENTIFIC_X = re.compile(r"^([-+]?[\d.]+)\s*[x×]\s*10\^?([-+−]?\d+)$")
+_IMPACT_METHOD = re.compile(r"\bTRACI\s*v?\s*(\d\.\d)", re.IGNORECASE)
+
+
+def _key(text: str) -> str:
+    return _KEY_CHARS.sub("", text.lower())
+
+
+def iter_markdown_tables(markdown: str) -> List[List[List[str]]]:
+    """
+    Find the pipe tables in a markdown document.
+    Returns:
+        list: One list of rows per table, each row a list of cell strings (separator rows dropped).
+    """
+    tables = []
+    rows = []
+    for line in markdown.splitlines():
+        if _TABLE_LINE.match(line):
+            cells = [c.strip().replace("\\|", "|") for c in _CELL_SPLIT.split(line.strip())[1:-1]]
+            if not all(_SEPARATOR_CELL.match(c) for c in cells if c):
+                rows.append(cells)
+        elif rows:
+            tables.append(rows)
+            rows = []
+    if rows:
+        tables.append(rows)
+    return tables
+
+
+def parse_number(text: str) -> Optional[float]:
+    """
+    Parse a table value such as "1.23E-02", "1,234.5", "−0.4" or "3.2 x 10-5".
+    Returns None for blanks and placeholders (ND, MND, INA, "-").
+    """
+    text = text.strip().replace(" ", "")
+    m = _SCIENTIFIC_X.match(text)
+    if m:
+        text = f"{m.group(1)}e{m.group(2)}"
+    text = text.replace("−", "-")
+    if not text or not any(ch.isdigit() for ch in text) or not _NUMBER.match(text):
+        return None
+    return float(text.replace(",", ""))
+
+
+def match_indicator(label: str) -> Tuple[Optional[Tuple[str, str]], str]:
+    """
+    Identify the indicator named in a row label.
+    Returns:
+        tuple: ((openEPD field, indicator key) or None, unit found in the label or "").
+    """
+    groups = _GROUPS.findall(label)
+    bare = _GROUPS.sub(" ", label).strip()
+    indicator = None
+    unit = ""
+    # The abbreviation may be the whole label, its first word, or in parentheses;
+    # any other parenthesised group is taken as the unit.
+    for candidate in [bare, bare.split(" ")[0] if bare else ""] + groups:
+        found = INDICATOR_ABBREVIATIONS.get(_key(candidate))
+        if found and indicator is None:
+            indicator = found
+    if indicator is None:
+        lowered = " ".join(bare.lower().replace("–", "-").split())
+        for name, found in INDICATOR_NAMES:
+            if lowered.startswith(name):
+                indicator = found
+                break
+    for group in groups:
+        if not INDICATOR_ABBREVIATIONS.get(_key(group)) and group.strip():
+            unit = group.strip()
+            break
+    return indicator, unit
+
+
+def _module_columns(header: List[str]) -> Dict[int, str]:
+    return {i: MODULES[_key(cell)] for i, cell in enumerate(header) if _key(cell) in MODULES}
+
+
+def _unit_column(header: List[str]) -> Optional[int]:
+    for i, cell in enumerate(header):
+        if _key(cell) in ("unit", "units"):
+            return i
+    return None
+
+
+def read_matrix_table(rows: List[List[str]], matrices: dict):
+    """
+    Add the indicator values of one table to matrices ({field: {indicator: {module: {mean, unit}}}}).
+    Tables with modules as rows and indicators as columns are transposed first.
+    Values already read from an earlier table are kept.
+    """
+    if len(rows) < 2:
+        return
+    header = rows[0]
+    modules = _module_columns(header)
+    if not modules and sum(_key(row[0]) in MODULES for row in rows[1:] if row) >= 2:
+        width = max(len(row) for row in rows)
+        rows = [list(column) for column in zip(*(row + [""] * (width - len(row)) for row in rows))]
+        header = rows[0]
+        modules = _module_columns(header)
+    if not modules:
+        return
+    unit_column = _unit_column(header)
+    for row in rows[1:]:
+        if not row:
+            continue
+        indicator, unit = match_indicator(row[0])
+        if indicator is None:
+            continue
+        if unit_column is not None and unit_column < len(row) and row[unit_column]:
+            unit = row[unit_column]
+        field, key = indicator
+        values = matrices.setdefault(field, {}).setdefault(key, {})
+        for column, module in modules.items():
+            if column < len(row) and module not in values:
+                number = parse_number(row[column])
+                if number is not None:
+                    values[module] = {"mean": number, "unit": unit}
+        if not values:
+            del matrices[field][key]
+
+
+def impact_method(markdown: str) -> str:
+    m = _IMPACT_METHOD.search(markdown)
+    return f"TRACI {m.group(1)}" if m else DEFAULT_IMPACT_METHOD
+
+
+def extract_matrices(markdown: str) -> dict:
+    """
+    Read the impacts, resource_uses and output_flows matrices from the markdown tables.
+    Args:
+        markdown (str): The document markdown.
+    Returns:
+        dict: openEPD fields that were found, e.g. {"impacts": {"TRACI 2.1": {"gwp": {"A1": {...}}}}}.
+        Fields with no recognized indicator are left out.
+    """
+    matrices = {}
+    for rows in iter_markdown_tables(markdown):
+        read_matrix_table(rows, matrices)
+    found = {field: indicators for field, indicators in matrices.items() if indicators}
+    if "impacts" in found:
+        found["impacts"] = {impact_method(markdown): found["impacts"]}
+    return {field: found[field] for field in _MATRIX_FIELDS if field in found}
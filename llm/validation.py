@@ -0,0 +1,138 @@
+"""
+openEPD schema validation.
+
+The schema is loaded and compiled into a validator (with format checking, so
+dates such as valid_until are checked too) once per process and shared by the
+Streamlit app, the batch pipeline and the repair step.
+
+Run as a script to audit many openEPD JSON files in parallel:
+    python validation.py DIR_OR_FILE [...] --report validation_report.json
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import jsonschema
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "openepd_validation_schema.json")
+
+with open(SCHEMA_PATH, "r") as f:
+    OPENEPD_SCHEMA = json.load(f)
+
+# The schema does not declare $schema, so pick the validator class from its contents.
+openepd_validator = jsonschema.validators.validator_for(OPENEPD_SCHEMA)(
+    OPENEPD_SCHEMA, format_checker=jsonschema.FormatChecker())
+
+
+def escape_pointer_token(token) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def json_pointer(path) -> str:
+    """
+    RFC 6901 JSON pointer for a path such as a ValidationError's absolute_path.
+    """
+    return "".join("/" + escape_pointer_token(p) for p in path)
+
+
+def pointer_tokens(pointer: str) -> list:
+    return [t.replace("~1", "/").replace("~0", "~") for t in pointer.split("/")[1:]]
+
+
+def validation_errors(doc) -> list:
+    """
+    Validate doc against the openEPD schema and return every violation, one per pointer.
+
+    Returns:
+        list: Dicts with "pointer", "message", "value" (the offending value) and
+        "missing" (True for an absent required property, reported at the
+        pointer of the missing field).
+    """
+    errors = {}
+    for e in openepd_validator.iter_errors(doc):
+        if e.validator == "required":
+            # One error is raised per missing key, each carrying the full list.
+            for key in e.validator_value:
+                pointer = json_pointer(list(e.absolute_path) + [key])
+                if isinstance(e.instance, dict) and key not in e.instance and pointer not in errors:
+                    errors[pointer] = {"pointer": pointer, "message": f"{key!r} is a required property",
+                                       "value": None, "missing": True}
+                    break
+        else:
+            pointer = json_pointer(e.absolute_path)
+            errors.setdefault(pointer, {"pointer": pointer, "message": e.message, "value": e.instance, "missing": False})
+    return list(errors.values())
+
+
+def is_valid_openepd(doc) -> bool:
+    return openepd_validator.is_valid(doc)
+
+
+def validate_file(path: str) -> dict:
+    """
+    Validate one openEPD JSON file.
+
+    Returns:
+        dict: Report with "file", "status" ("valid", "invalid" or "unreadable") and "errors".
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        return {"file": path, "status": "unreadable", "errors": [{"pointer": "", "message": str(e)}]}
+    errors = [{"pointer": e["pointer"], "message": e["message"]} for e in validation_errors(doc)]
+    return {"file": path, "status": "invalid" if errors else "valid", "errors": errors}
+
+
+def collect_json_files(inputs: list) -> list:
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _dirs, files in os.walk(item):
+                paths.extend(os.path.join(root, name) for name in files if name.lower().endswith(".json"))
+        else:
+            paths.append(item)
+    return sorted(dict.fromkeys(paths))
+
+
+def validate_files(paths: list, workers: int = None) -> list:
+    """
+    Validate many files across a process pool. Reports come back in input order.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 2:
+        return [validate_file(p) for p in paths]
+    # Large chunks keep the per-file IPC overhead small next to validation itself.
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(validate_file, paths, chunksize=chunksize))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate openEPD JSON files against the openEPD schema.")
+    parser.add_argument("inputs", nargs="+", help="JSON files or directories searched recursively for .json files.")
+    parser.add_argument("--report", default="validation_report.json", help="Where to write the per-file report.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Validation processes.")
+    args = parser.parse_args()
+
+    paths = collect_json_files(args.inputs)
+    started = time.perf_counter()
+    reports = validate_files(paths, args.workers)
+    counts = {}
+    for report in reports:
+        counts[report["status"]] = counts.get(report["status"], 0) + 1
+    summary = {
+        "total": len(reports),
+        "counts": counts,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+        "files": reports,
+    }
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Validated {len(reports)} files in {summary['elapsed_seconds']}s: {counts}")
+
+
+if __name__ == "__main__":
+    main()